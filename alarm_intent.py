@@ -0,0 +1,401 @@
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import date as date_cls, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from livekit.agents import llm
+
+logger = logging.getLogger("alarm-intent")
+
+WEEKDAYS = {"senin": 0, "selasa": 1, "rabu": 2, "kamis": 3, "jumat": 4, "sabtu": 5, "minggu": 6, "ahad": 6}
+MONTHS = {
+    "januari": 1, "jan": 1, "februari": 2, "pebruari": 2, "feb": 2, "maret": 3, "mar": 3, "april": 4, "apr": 4,
+    "mei": 5, "juni": 6, "jun": 6, "juli": 7, "jul": 7, "agustus": 8, "agu": 8, "agt": 8, "september": 9,
+    "sep": 9, "sept": 9, "oktober": 10, "okt": 10, "november": 11, "nopember": 11, "nov": 11, "desember": 12, "des": 12,
+}
+_DIGIT_WORDS = {"nol": 0, "satu": 1, "dua": 2, "tiga": 3, "empat": 4, "lima": 5, "enam": 6, "tujuh": 7,
+                "delapan": 8, "sembilan": 9}
+_DIGIT_WORD_RE = "|".join(_DIGIT_WORDS)
+
+_WAKE_RE = re.compile(r'\b(bangunkan|bangunin|ingatkan|ingetin|ingatin)\b')
+_ALARM_RE = re.compile(r'\balarm(?:nya)?\b')
+_SET_VERB_RE = re.compile(r'\b(pasang|pasangkan|pasangin|setel|setelkan|setelin|set|atur|aturkan|aturin|'
+                          r'buat|buatkan|buatin|bikin|bikinin|nyalakan|aktifkan)\b')
+_NEGATIVE_RE = re.compile(r'\b(hapus|batalkan|batal|matikan|cancel|ganti|ubah|jangan)\b')
+
+_CLOCK_RE = re.compile(
+    r'\b(?:jam|pukul)\s+(?:(?P<half>setengah)\s+(?P<half_hour>\d{1,2})|(?P<hour>\d{1,2})(?:[:.](?P<minute>\d{2}))?)'
+    r'(?:\s+(?:(?P<past>lewat|lebih)\s+(?P<past_min>\d{1,2}|seperempat)(?:\s+menit)?'
+    r'|kurang\s+(?P<to_min>\d{1,2}|seperempat)(?:\s+menit)?|tepat))?'
+)
+_RELATIVE_RE = re.compile(r'\b(?:(?P<amount>\d{1,3}|setengah|se)\s*(?P<unit>menit|jam))\s+(?:lagi|dari sekarang)\b')
+_RELATIVE_DAY_RE = re.compile(r'\b(?:(?P<amount>\d{1,3})\s+|se)(?P<unit>hari|minggu|pekan)\s+(?:lagi|dari sekarang)\b')
+_PERIOD_RE = re.compile(r'\b(pagi|siang|sore|petang|malam|subuh|dini hari)\b')
+_PERIOD_GAP_RE = re.compile(r'\s*(?:(?:nanti|besok|lusa|hari ini)\s+)?')
+_RECURRENCE_RE = re.compile(r'\b(tiap|setiap|sehari-hari|saban|rutin)\b')
+_DAY_WORD_RE = re.compile(r'\b(hari ini|nanti|besok lusa|besok|lusa)\b')
+_WEEKDAY_RE = re.compile(r'\b(?:hari\s+)?(?P<day>' + "|".join(WEEKDAYS) + r')(?:\s+(?P<mod>depan|minggu depan|ini))?\b')
+_DAY_OF_MONTH_RE = re.compile(
+    r'\b(?:tanggal|tgl)\s+(?P<day>\d{1,2})(?:\s*(?:/|-)\s*(?P<month_num>\d{1,2})|\s+(?P<month>' + "|".join(MONTHS)
+    + r'))?(?:\s+(?P<year>\d{4}))?\b'
+    r'|\b(?P<day2>\d{1,2})\s+(?P<month2>' + "|".join(MONTHS) + r')(?:\s+(?P<year2>\d{4}))?\b'
+)
+_MESSAGE_MARKER_RE = re.compile(r'\b(untuk|buat|dengan pesan|pesannya|pesan|judulnya|labelnya|label|keterangannya)\s+')
+_MESSAGE_FILLER_RE = re.compile(r'\b(ya|yah|dong|deh|tolong|ok|oke)\b')
+# Connectors left over next to a removed date/time ("rapat pada [hari senin]"); only trimmed at piece edges.
+_MESSAGE_EDGE_WORDS = {"di", "pada", "hari", "tanggal", "jam", "pukul", "nanti"}
+_MESSAGE_LEADING_WORDS = _MESSAGE_EDGE_WORDS | {"saya", "aku", "ku", "alarm", "alarmnya"}
+
+
+@dataclass
+class AlarmIntent:
+    """Alarm details resolved locally from one transcript; unset fields still need the LLM."""
+    transcript: str
+    mentions_alarm: bool = False
+    hour: Optional[int] = None
+    minute: Optional[int] = None
+    date: Optional[str] = None
+    message: Optional[str] = None
+    notes: List[str] = field(default_factory=list)
+    ambiguities: List[str] = field(default_factory=list)
+
+    @property
+    def complete(self) -> bool:
+        return (self.hour is not None and self.minute is not None and bool(self.date)
+                and bool(self.message) and not self.ambiguities)
+
+
+def _number_words_to_digits(text: str) -> str:
+    def tens(m):
+        return str(10 * _DIGIT_WORDS[m.group(1)] + (_DIGIT_WORDS[m.group(2)] if m.group(2) else 0))
+
+    text = re.sub(rf'\b({_DIGIT_WORD_RE})\s+puluh(?:\s+({_DIGIT_WORD_RE}))?\b', tens, text)
+    text = re.sub(r'\bsepuluh\b', '10', text)
+    text = re.sub(r'\bsebelas\b', '11', text)
+    text = re.sub(rf'\b({_DIGIT_WORD_RE})\s+belas\b', lambda m: str(10 + _DIGIT_WORDS[m.group(1)]), text)
+    return re.sub(rf'\b({_DIGIT_WORD_RE})\b', lambda m: str(_DIGIT_WORDS[m.group(1)]), text)
+
+
+def normalize_transcript(text: str) -> str:
+    text = text.lower().replace("jum'at", "jumat").replace("’", "'")
+    text = re.sub(r'(?<!\d)[.,](?!\d)|[!?;"()]', ' ', text)
+    text = _number_words_to_digits(text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _minutes_value(token: str) -> int:
+    return 15 if token == "seperempat" else int(token)
+
+
+def _resolve_period(hour: int, period: Optional[str]) -> Tuple[int, bool]:
+    """Maps a 12-hour spoken hour plus day period to 24h; returns (hour, certain)."""
+    if period in ("pagi", "subuh", "dini hari"):
+        return (hour, True) if hour < 12 else (hour, False)
+    if period == "siang":
+        if hour in (11, 12):
+            return hour, True
+        return (hour + 12, True) if 1 <= hour <= 5 else (hour, False)
+    if period in ("sore", "petang"):
+        return (hour + 12, True) if 1 <= hour <= 11 else (hour, False)
+    if period == "malam":
+        if 6 <= hour <= 11:
+            return hour + 12, True
+        return hour % 12, False
+    return hour, False
+
+
+def _parse_clock(text: str) -> Tuple[Optional[int], Optional[int], bool, Optional[re.Match]]:
+    """Returns (hour, minute, explicitly_24h, match) for the first 'jam/pukul ...' expression."""
+    match = _CLOCK_RE.search(text)
+    if not match:
+        return None, None, False, None
+    if match.group("half"):
+        hour, minute = int(match.group("half_hour")) - 1, 30
+        explicit = False
+    else:
+        raw_hour = match.group("hour")
+        hour, minute = int(raw_hour), int(match.group("minute") or 0)
+        explicit = hour >= 13 or hour == 0 or (len(raw_hour) == 2 and raw_hour.startswith("0"))
+    if match.group("past"):
+        minute += _minutes_value(match.group("past_min"))
+    elif match.group("to_min"):
+        hour, minute = hour - 1, 60 - _minutes_value(match.group("to_min"))
+    hour %= 24
+    if not (0 <= minute <= 59) or hour > 23:
+        return None, None, False, match
+    return hour, minute, explicit, match
+
+
+def _is_week_word(text: str, match: re.Match) -> bool:
+    """True when 'minggu' means 'week' ("2 minggu lagi", "se minggu"), not Sunday."""
+    if match.group("day") != "minggu" or match.group(0).startswith("hari"):
+        return False
+    before = text[:match.start()].split()
+    if before and (before[-1].isdigit() or before[-1] in ("se", "beberapa", "tiap", "setiap")):
+        return True
+    return text[match.end():].lstrip().startswith("lagi")
+
+
+def _find_period(text: str, clock: Optional[re.Match], marker: Optional[re.Match]) -> Optional[re.Match]:
+    """The day period that qualifies the clock time; a 'siang' inside the label ("makan siang") does not."""
+    periods = list(_PERIOD_RE.finditer(text))
+    if clock:
+        for match in periods:
+            if _PERIOD_GAP_RE.fullmatch(text[clock.end():match.start()]):
+                return match
+    return next((m for m in periods if marker is None or m.start() < marker.start()), None)
+
+
+def _date_expressions(text: str) -> List[re.Match]:
+    """Every non-overlapping date expression in text ("besok", "hari jumat", "tanggal 21", "3 hari lagi")."""
+    matches = list(_DAY_OF_MONTH_RE.finditer(text)) + list(_RELATIVE_DAY_RE.finditer(text))
+    matches += [m for m in _WEEKDAY_RE.finditer(text) if not _is_week_word(text, m)]
+    matches += [m for m in _DAY_WORD_RE.finditer(text) if m.group(1) != "nanti"]
+    distinct: List[re.Match] = []
+    for match in sorted(matches, key=lambda m: (m.start(), -m.end())):
+        if not distinct or match.start() >= distinct[-1].end():
+            distinct.append(match)
+    return distinct
+
+
+def _resolve_date(text: str, today: date_cls, notes: List[str], ambiguities: List[str],
+                  spans: List[Tuple[int, int]]) -> Optional[date_cls]:
+    match = _DAY_OF_MONTH_RE.search(text)
+    if match:
+        spans.append(match.span())
+        day = int(match.group("day") or match.group("day2"))
+        month_token = match.group("month") or match.group("month2")
+        month = MONTHS[month_token] if month_token else (int(match.group("month_num")) if match.group("month_num") else None)
+        year_token = match.group("year") or match.group("year2")
+        year = int(year_token) if year_token else today.year
+        try:
+            resolved = date_cls(year, month or today.month, day)
+            if resolved < today and not year_token:
+                if month is None:
+                    next_month = today.month % 12 + 1
+                    resolved = date_cls(today.year + (today.month == 12), next_month, day)
+                else:
+                    resolved = date_cls(year + 1, month, day)
+        except ValueError:
+            ambiguities.append(f"tanggal '{match.group(0)}' tidak valid")
+            return None
+        notes.append(f"'{match.group(0)}' = {resolved.isoformat()}")
+        return resolved
+
+    match = _RELATIVE_DAY_RE.search(text)
+    if match:
+        spans.append(match.span())
+        amount = int(match.group("amount") or 1)
+        days = amount if match.group("unit") == "hari" else 7 * amount
+        resolved = today + timedelta(days=days)
+        notes.append(f"'{match.group(0)}' = {resolved.isoformat()}")
+        return resolved
+
+    match = next((m for m in _WEEKDAY_RE.finditer(text) if not _is_week_word(text, m)), None)
+    if match:
+        spans.append(match.span())
+        target = WEEKDAYS[match.group("day")]
+        days_ahead = (target - today.weekday()) % 7
+        modifier = match.group("mod")
+        if match.group("day") == "minggu" and modifier in ("depan", "ini") and not match.group(0).startswith("hari"):
+            ambiguities.append(f"'{match.group(0)}' bisa berarti hari Minggu atau pekan {modifier}")
+            return None
+        if modifier in ("depan", "minggu depan"):
+            resolved = today + timedelta(days=7 - today.weekday() + target)
+        elif modifier == "ini" or days_ahead:
+            resolved = today + timedelta(days=days_ahead)
+        else:
+            ambiguities.append(f"'{match.group(0)}' bisa berarti hari ini atau minggu depan")
+            return None
+        notes.append(f"'{match.group(0)}' = {resolved.isoformat()}")
+        return resolved
+
+    match = _DAY_WORD_RE.search(text)
+    if match:
+        spans.append(match.span())
+        offset = {"hari ini": 0, "nanti": 0, "besok": 1, "lusa": 2, "besok lusa": 2}[match.group(1)]
+        resolved = today + timedelta(days=offset)
+        notes.append(f"'{match.group(1)}' = {resolved.isoformat()}")
+        return resolved
+    return None
+
+
+def _extract_message(text: str, intent_end: int, spans: List[Tuple[int, int]]) -> Optional[str]:
+    for marker in _MESSAGE_MARKER_RE.finditer(text, intent_end):
+        start = marker.end()
+        # Cut the resolved date/time expressions out; each remaining piece loses connectors at its edges.
+        cuts = sorted((max(s, start), e) for s, e in spans if e > start)
+        pieces = []
+        position = start
+        for cut_start, cut_end in cuts + [(len(text), len(text))]:
+            if cut_start > position:
+                pieces.append(text[position:cut_start])
+            position = max(position, cut_end)
+        words = []
+        for index, piece in enumerate(pieces):
+            piece_words = _MESSAGE_FILLER_RE.sub(" ", piece).split()
+            leading = _MESSAGE_LEADING_WORDS if index == 0 else _MESSAGE_EDGE_WORDS
+            while piece_words and piece_words[0] in leading:
+                piece_words.pop(0)
+            while piece_words and piece_words[-1] in _MESSAGE_EDGE_WORDS:
+                piece_words.pop()
+            words.extend(piece_words)
+        if words:
+            message = " ".join(words)
+            return message[0].upper() + message[1:]
+    return None
+
+
+def parse_alarm_command(transcript: str, now: Optional[datetime] = None) -> Optional[AlarmIntent]:
+    """Parses an Indonesian 'set an alarm' request. Returns None if the transcript is not one."""
+    now = now or datetime.now()
+    text = normalize_transcript(transcript)
+    wake = _WAKE_RE.search(text)
+    alarm = _ALARM_RE.search(text)
+    if not wake and not (alarm and _SET_VERB_RE.search(text)):
+        return None
+    if _NEGATIVE_RE.search(text):
+        return None
+    intent_end = (wake or alarm).end()
+
+    intent = AlarmIntent(transcript=transcript, mentions_alarm=bool(alarm))
+    # One alarm per send: recurring or multi-time requests go to the LLM to confirm.
+    recurrence = _RECURRENCE_RE.search(text)
+    if recurrence:
+        intent.ambiguities.append(f"'{recurrence.group(1)}' = alarm berulang, tidak bisa dikirim sebagai satu alarm")
+    clocks = list(_CLOCK_RE.finditer(text))
+    if len(clocks) > 1:
+        intent.ambiguities.append("lebih dari satu waktu: " + ", ".join(f"'{m.group(0)}'" for m in clocks))
+    dates = _date_expressions(text)
+    if len(dates) > 1:
+        intent.ambiguities.append("lebih dari satu tanggal: " + ", ".join(f"'{m.group(0)}'" for m in dates))
+    spans: List[Tuple[int, int]] = []
+    today = now.date()
+    resolved_date: Optional[date_cls] = None
+
+    relative = _RELATIVE_RE.search(text)
+    if relative:
+        spans.append(relative.span())
+        amount_token = relative.group("amount")
+        amount = 0.5 if amount_token == "setengah" else 1 if amount_token == "se" else int(amount_token)
+        delta = timedelta(minutes=amount) if relative.group("unit") == "menit" else timedelta(hours=amount)
+        target = now + delta
+        intent.hour, intent.minute = target.hour, target.minute
+        resolved_date = target.date()
+        intent.notes.append(f"'{relative.group(0)}' = {target.strftime('%Y-%m-%d %H:%M')}")
+        if clocks or dates:
+            intent.ambiguities.append(f"'{relative.group(0)}' bertabrakan dengan waktu/tanggal lain")
+    else:
+        hour, minute, explicit, clock = _parse_clock(text)
+        if clock:
+            spans.append(clock.span())
+        period_match = _find_period(text, clock, _MESSAGE_MARKER_RE.search(text, intent_end))
+        if period_match:
+            spans.append(period_match.span())
+        if hour is not None:
+            certain = explicit
+            if not explicit:
+                hour, certain = _resolve_period(hour, period_match.group(1) if period_match else None)
+            intent.hour, intent.minute = hour, minute
+            if not certain:
+                intent.ambiguities.append(f"jam {hour:02d}:{minute:02d} belum jelas pagi/siang/malam")
+            else:
+                intent.notes.append(f"'{clock.group(0)}{' ' + period_match.group(1) if period_match else ''}' = {hour:02d}:{minute:02d}")
+        resolved_date = _resolve_date(text, today, intent.notes, intent.ambiguities, spans)
+        if resolved_date is None and intent.hour is not None and not intent.ambiguities:
+            # Like a phone alarm: the next time the clock shows this time.
+            candidate = datetime.combine(today, datetime.min.time()).replace(hour=intent.hour, minute=intent.minute)
+            resolved_date = today if candidate > now else today + timedelta(days=1)
+            intent.notes.append(f"tanpa tanggal = {resolved_date.isoformat()} (jam berikutnya)")
+
+    if resolved_date is not None:
+        intent.date = resolved_date.isoformat()
+        if intent.hour is not None:
+            when = datetime.combine(resolved_date, datetime.min.time()).replace(hour=intent.hour, minute=intent.minute)
+            if when <= now:
+                intent.ambiguities.append(f"{when.strftime('%Y-%m-%d %H:%M')} sudah lewat")
+
+    intent.message = _extract_message(text, intent_end, spans)
+    if not intent.message and wake and wake.group(1).startswith("bangun"):
+        intent.message = "Bangun"
+    return intent
+
+
+def _message_text(message: llm.ChatMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return " ".join(part for part in (content or []) if isinstance(part, str))
+
+
+class AlarmFastPath:
+    """Handles alarm commands locally before the LLM sees the turn.
+
+    on_transcript() parses every final transcript. When the committed turn is
+    an unambiguous alarm request, handle() sends the set_alarm payload through
+    AssistantFnc directly and the LLM call is skipped; otherwise the resolved
+    fields are added to the ChatContext so the model only asks for what is missing.
+    """
+
+    def __init__(self, assistant_fnc, *, direct_send: bool = True) -> None:
+        self._fnc = assistant_fnc
+        self._direct_send = direct_send
+        self._last: Optional[AlarmIntent] = None
+        self.sent_directly = 0
+        self.send_failed = 0
+        self.prefilled = 0
+
+    def on_transcript(self, transcript: str) -> None:
+        self._last = parse_alarm_command(transcript)
+        if self._last:
+            logger.info("Alarm intent detected locally: date=%s time=%s:%s message=%s ambiguities=%s",
+                        self._last.date, self._last.hour, self._last.minute, self._last.message, self._last.ambiguities)
+
+    async def handle(self, agent, chat_ctx: llm.ChatContext) -> bool:
+        """Returns True when the alarm was sent locally and the LLM call should be skipped."""
+        if not chat_ctx.messages or chat_ctx.messages[-1].role != "user":
+            return False
+        user_text = _message_text(chat_ctx.messages[-1])
+        last, self._last = self._last, None
+        intent = last if last and last.transcript.strip() == user_text.strip() else parse_alarm_command(user_text)
+        if intent is None:
+            return False
+
+        send_error = None
+        if intent.complete and self._direct_send:
+            logger.info("Sending alarm from local fast path: %s %02d:%02d '%s'", intent.date, intent.hour, intent.minute, intent.message)
+            sent, reply = await self._fnc.send_alarm(intent.hour, intent.minute, intent.date, intent.message)
+            if sent:
+                agent.chat_ctx.append(role="user", text=user_text)
+                asyncio.create_task(agent.say(reply, allow_interruptions=True))
+                self.sent_directly += 1
+                return True
+            # Let the LLM explain the failure or retry through set_device_alarm.
+            logger.warning("Local alarm send failed, handing the turn to the LLM: %s", reply)
+            self.send_failed += 1
+            send_error = reply
+
+        if not (intent.mentions_alarm or intent.date or intent.hour is not None or intent.message):
+            # "Ingatkan saya apa yang kita bahas" is a memory question, not an alarm; don't steer the LLM.
+            return False
+
+        known = []
+        if intent.date:
+            known.append(f"tanggal={intent.date}")
+        if intent.hour is not None and intent.minute is not None:
+            known.append(f"waktu={intent.hour:02d}:{intent.minute:02d}")
+        if intent.message:
+            known.append(f"pesan='{intent.message}'")
+        note = "Deteksi lokal perintah alarm: " + (", ".join(known) if known else "belum ada detail yang pasti")
+        if intent.notes:
+            note += ". Resolusi: " + "; ".join(intent.notes)
+        if intent.ambiguities:
+            note += ". Perlu dikonfirmasi: " + "; ".join(intent.ambiguities)
+        if send_error:
+            note += f". Pengiriman langsung gagal: {send_error}"
+        note += ". Gunakan nilai ini apa adanya dan tanyakan hanya detail yang belum pasti."
+        chat_ctx.messages.insert(len(chat_ctx.messages) - 1, llm.ChatMessage.create(role="system", text=note))
+        self.prefilled += 1
+        return False
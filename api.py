@@ -2,9 +2,9 @@ import asyncio
 import json
 import os
 import aiohttp
-import traceback
-from typing import Annotated, List, Optional, Callable, Awaitable
+from typing import Annotated, AsyncIterator, List, Optional, Callable, Awaitable, Tuple
 from livekit.agents import llm
+from speech_text import SpeechSegmenter
 import logging
 import random
 import time
@@ -16,12 +16,48 @@ logger.setLevel(logging.INFO)
 MEMORY_TOPICS = ["personal info", "preferences", "concerns", "goals", "life events", "relationships", "user name", "user age", "past advice", "feedback", "meeting schedule", "important dates"]
 SEMANTIC_QUERY_RECALL_DEFAULT = "Information relevant to the user's current topic or question"
 SEMANTIC_QUERY_NAME_RECALL = "What is the user's name?"
+SEMANTIC_QUERY_GENERAL_STARTUP = (
+    "Key points, facts, preferences, user's name, user's recent mood, "
+    "and user's recent concerns shared in previous conversations"
+)
 MEM0_API_TIMEOUT = 10.0
 DEVICE_ACTION_TIMEOUT = 15.0
 INTERNET_SEARCH_TIMEOUT = 25.0
+# Opt-in: stream the Perplexity answer straight into TTS instead of handing it back to the LLM to rephrase.
+SEARCH_DIRECT_SPEECH = os.getenv('SEARCH_DIRECT_SPEECH', 'false').lower() == 'true'
+SEARCH_CONTEXT_MAX_CHARS = 400
 
 SendDataCallback = Callable[[str], Awaitable[None]]
-AssistantSayCallback = Callable[[str], Awaitable[None]]
+AssistantSayCallback = Callable[..., Awaitable[None]]
+
+
+def _search_error_message(status: int) -> str:
+    if status == 401:
+        return "Maaf, terjadi masalah otentikasi dengan layanan pencarian."
+    elif status == 429:
+        return "Maaf, batas penggunaan layanan pencarian telah tercapai. Coba lagi nanti."
+    return f"Maaf, terjadi kesalahan saat mencari informasi (Kode: {status})."
+
+
+async def _iter_perplexity_stream(response: aiohttp.ClientResponse) -> AsyncIterator[str]:
+    """Yields content deltas from a streaming (SSE) Perplexity chat completion."""
+    async for raw_line in response.content:
+        line = raw_line.decode('utf-8').strip()
+        if not line.startswith("data:"):
+            continue
+        payload = line[len("data:"):].strip()
+        if payload == "[DONE]":
+            break
+        try:
+            chunk = json.loads(payload)
+        except json.JSONDecodeError:
+            logger.debug("Skipping undecodable Perplexity stream line: %.100s", payload)
+            continue
+        choices = chunk.get("choices") or []
+        if choices:
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                yield delta
 
 class AssistantFnc(llm.FunctionContext):
     def __init__(self,
@@ -34,7 +70,7 @@ class AssistantFnc(llm.FunctionContext):
         self._assistant_say_callback: Optional[AssistantSayCallback] = None
         self._current_user_id: Optional[str] = None
         self._user_name: Optional[str] = None
-        logger.info(f"AssistantFnc initialized. Mem0: {client is not None}, SendData: {send_data_callback is not None}")
+        logger.info("AssistantFnc initialized. Mem0: %s, SendData: %s", client is not None, send_data_callback is not None)
 
     def set_assistant_say_callback(self, say_callback: AssistantSayCallback):
         self._assistant_say_callback = say_callback
@@ -45,14 +81,14 @@ class AssistantFnc(llm.FunctionContext):
              logger.error("Attempted to set an empty user_id.")
              return
         self._current_user_id = user_id
-        logger.info(f"Set current user ID for API context: {user_id}")
+        logger.info("Set current user ID for API context: %s", user_id)
 
         if not self._mem0_client:
             logger.warning("Mem0 Client not available in API context. Cannot recall name on set_user_id.")
             return
         try:
             start_time = time.time()
-            logger.debug(f"Attempting initial name recall (in thread) for {user_id} in API context.")
+            logger.debug("Attempting initial name recall (in thread) for %s in API context.", user_id)
             search_coro = asyncio.to_thread(
                 self._mem0_client.search,
                 query=SEMANTIC_QUERY_NAME_RECALL,
@@ -60,7 +96,7 @@ class AssistantFnc(llm.FunctionContext):
                 limit=1
             )
             name_memories = await asyncio.wait_for(search_coro, timeout=MEM0_API_TIMEOUT)
-            logger.debug(f"Initial name recall search took {time.time() - start_time:.2f}s")
+            logger.debug("Initial name recall search took %.2fs", time.time() - start_time)
 
             if isinstance(name_memories, list) and name_memories:
                 memory_text = name_memories[0].get("memory", "")
@@ -69,17 +105,17 @@ class AssistantFnc(llm.FunctionContext):
                         potential_name = memory_text.lower().split("name is", 1)[1].strip().rstrip('.?!').capitalize()
                         if potential_name:
                             self._user_name = potential_name
-                            logger.info(f"Tentatively cached user name from initial recall: {self._user_name}")
+                            logger.info("Tentatively cached user name from initial recall: %s", self._user_name)
                     except IndexError:
-                        logger.warning(f"Could not parse name from memory: '{memory_text}'")
+                        logger.warning("Could not parse name from memory: '%s'", memory_text)
                     except Exception as e:
-                        logger.error(f"Error parsing name from memory: {e}", exc_info=True)
+                        logger.error("Error parsing name from memory: %s", e, exc_info=True)
         except asyncio.TimeoutError:
-             logger.warning(f"Initial name recall timed out after {MEM0_API_TIMEOUT}s.")
+             logger.warning("Initial name recall timed out after %ss.", MEM0_API_TIMEOUT)
         except AttributeError:
              logger.warning("Mem0 client instance does not have a 'search' method or call failed.")
         except Exception as e:
-            logger.error(f"Error during initial name recall in API context: {e}", exc_info=True)
+            logger.error("Error during initial name recall in API context: %s", e, exc_info=True)
 
     @llm.ai_callable(description="Remember the user's name when they explicitly state it (e.g., 'My name is John').")
     def remember_name(
@@ -90,7 +126,7 @@ class AssistantFnc(llm.FunctionContext):
              logger.warning("LLM called remember_name with empty name.")
              return "Maaf, sepertinya Anda belum menyebutkan nama."
 
-        logger.info(f"LLM identified user's name: {name}")
+        logger.info("LLM identified user's name: %s", name)
         self._user_name = name.strip().capitalize()
 
         if self._current_user_id and self._mem0_client:
@@ -101,10 +137,10 @@ class AssistantFnc(llm.FunctionContext):
                     user_id=self._current_user_id,
                     metadata={'category': 'personal_details', 'type': 'name', 'value': self._user_name}
                 )
-                logger.info(f"Stored user name memory for user {self._current_user_id}")
+                logger.info("Stored user name memory for user %s", self._current_user_id)
                 return f"Baik, {self._user_name}. Senang mengetahui nama Anda. Saya akan mengingatnya."
             except Exception as e:
-                logger.error(f"Failed to store name in Mem0 for user {self._current_user_id}: {e}", exc_info=True)
+                logger.error("Failed to store name in Mem0 for user %s: %s", self._current_user_id, e, exc_info=True)
                 return f"Baik, {self._user_name}. Saya akan coba mengingatnya, tapi ada sedikit masalah dengan sistem memori jangka panjang saya."
         else:
             logger.warning("Cannot store name: User ID or Mem0 client not available.")
@@ -123,7 +159,7 @@ class AssistantFnc(llm.FunctionContext):
              logger.warning("LLM called remember_important_info with empty topic.")
              memory_topic = "general info"
 
-        logger.info(f"LLM wants to remember: Topic='{memory_topic}', Content='{content[:100]}...'")
+        logger.info("LLM wants to remember: Topic='%s', Content='%.100s...'", memory_topic, content)
 
         if not self._current_user_id or not self._mem0_client:
             logger.warning("Cannot store info: User ID or Mem0 client not available.")
@@ -135,10 +171,10 @@ class AssistantFnc(llm.FunctionContext):
                 user_id=self._current_user_id,
                 metadata={'category': memory_topic.lower().replace(" ", "_"), 'value': content.strip()}
             )
-            logger.info(f"Stored info in Mem0 for user {self._current_user_id}: Topic='{memory_topic}'")
+            logger.info("Stored info in Mem0 for user %s: Topic='%s'", self._current_user_id, memory_topic)
             return f"Oke, saya sudah catat informasi tentang {memory_topic} itu."
         except Exception as e:
-            logger.error(f"Failed to store info in Mem0 for user {self._current_user_id}: {e}", exc_info=True)
+            logger.error("Failed to store info in Mem0 for user %s: %s", self._current_user_id, e, exc_info=True)
             return "Maaf, terjadi masalah saat mencoba menyimpan informasi itu ke memori jangka panjang."
 
     @llm.ai_callable(description="Recall relevant past information based on a specific topic, keyword, or question about previous conversations.")
@@ -163,7 +199,7 @@ class AssistantFnc(llm.FunctionContext):
         try:
             start_time = time.time()
             search_query = topic_query.strip()
-            logger.info(f"Recalling memories (in thread) for user {self._current_user_id} with query: '{search_query}' (limit: {safe_limit})")
+            logger.info("Recalling memories (in thread) for user %s with query: '%s' (limit: %d)", self._current_user_id, search_query, safe_limit)
 
             search_coro = asyncio.to_thread(
                 self._mem0_client.search,
@@ -172,7 +208,7 @@ class AssistantFnc(llm.FunctionContext):
                 limit=safe_limit
             )
             search_results = await asyncio.wait_for(search_coro, timeout=MEM0_API_TIMEOUT)
-            logger.debug(f"Memory recall search took {time.time() - start_time:.2f}s")
+            logger.debug("Memory recall search took %.2fs", time.time() - start_time)
 
             memories_content = []
             if isinstance(search_results, list):
@@ -182,21 +218,21 @@ class AssistantFnc(llm.FunctionContext):
                 ]
 
             if not memories_content:
-                logger.info(f"No relevant memories found for query: '{search_query}'")
+                logger.info("No relevant memories found for query: '%s'", search_query)
                 return f"Saya sudah mencari, tapi tidak menemukan catatan spesifik tentang '{search_query}'."
 
             memory_text_formatted = "\n".join([f"- {mem}" for mem in memories_content])
-            logger.info(f"Found {len(memories_content)} memories for query: '{search_query}'")
+            logger.info("Found %d memories for query: '%s'", len(memories_content), search_query)
             return f"Mengenai '{search_query}', ini beberapa hal yang saya ingat dari percakapan kita sebelumnya:\n{memory_text_formatted}"
 
         except asyncio.TimeoutError:
-             logger.warning(f"Memory recall timed out after {MEM0_API_TIMEOUT}s for query: '{search_query}'.")
+             logger.warning("Memory recall timed out after %ss for query: '%s'.", MEM0_API_TIMEOUT, search_query)
              return "Maaf, saya butuh waktu terlalu lama untuk mencoba mengingat itu."
         except AttributeError:
              logger.warning("Mem0 client instance does not have a 'search' method or call failed.")
              return "Maaf, saya tidak bisa mengakses memori jangka panjang saat ini."
         except Exception as e:
-            logger.error(f"Failed to recall memories from Mem0 for user {self._current_user_id}: {e}", exc_info=True)
+            logger.error("Failed to recall memories from Mem0 for user %s: %s", self._current_user_id, e, exc_info=True)
             return "Terjadi masalah saat mencoba mengakses memori jangka panjang."
 
     @llm.ai_callable(description="Sets an alarm on the user's connected device. "
@@ -211,30 +247,37 @@ class AssistantFnc(llm.FunctionContext):
         date: Annotated[str, llm.TypeInfo(description="The exact date for the alarm in YYYY-MM-DD format.")],
         message: Annotated[str, llm.TypeInfo(description="The descriptive message or label for the alarm (e.g., 'Meeting kantor bulanan', 'Jemput anak sekolah').")]
     ):
-        logger.info(f"LLM requests to set alarm: Date='{date}', Time={hour:02d}:{minute:02d}, Message='{message}'")
+        logger.info("LLM requests to set alarm: Date='%s', Time=%02d:%02d, Message='%s'", date, hour, minute, message)
+        _, reply = await self.send_alarm(hour, minute, date, message)
+        return reply
+
+    async def send_alarm(self, hour: int, minute: int, date: str, message: str) -> Tuple[bool, str]:
+        """Validates and sends a 'set_alarm' command to the client.
 
+        Returns (sent, reply to speak); reply explains the failure when sent is False.
+        """
         if not isinstance(hour, int) or not (0 <= hour <= 23):
-            logger.error(f"Invalid hour received from LLM: {hour}")
-            return "Maaf, jam alarm tidak valid (harus antara 0 dan 23)."
+            logger.error("Invalid hour received from LLM: %s", hour)
+            return False, "Maaf, jam alarm tidak valid (harus antara 0 dan 23)."
         if not isinstance(minute, int) or not (0 <= minute <= 59):
-            logger.error(f"Invalid minute received from LLM: {minute}")
-            return "Maaf, menit alarm tidak valid (harus antara 0 dan 59)."
+            logger.error("Invalid minute received from LLM: %s", minute)
+            return False, "Maaf, menit alarm tidak valid (harus antara 0 dan 59)."
         if not message or not message.strip():
             logger.error("Empty alarm message received from LLM.")
-            return "Maaf, pesan untuk alarm tidak boleh kosong."
+            return False, "Maaf, pesan untuk alarm tidak boleh kosong."
         try:
             datetime.strptime(date, '%Y-%m-%d')
         except ValueError:
-            logger.error(f"Invalid date format received from LLM: {date}")
-            return f"Maaf, format tanggal ('{date}') sepertinya tidak valid. Gunakan format YYYY-MM-DD."
+            logger.error("Invalid date format received from LLM: %s", date)
+            return False, f"Maaf, format tanggal ('{date}') sepertinya tidak valid. Gunakan format YYYY-MM-DD."
 
         if not self._send_data_callback:
             logger.error("Send data callback is not configured. Cannot send alarm command.")
-            return "Maaf, saya tidak dapat mengirim perintah alarm ke perangkat Anda saat ini karena masalah koneksi internal."
+            return False, "Maaf, saya tidak dapat mengirim perintah alarm ke perangkat Anda saat ini karena masalah koneksi internal."
 
         if not self._current_user_id:
              logger.error("User ID not set. Cannot determine target for alarm command.")
-             return "Maaf, saya tidak yakin harus mengirim perintah alarm ke siapa. Terjadi masalah internal."
+             return False, "Maaf, saya tidak yakin harus mengirim perintah alarm ke siapa. Terjadi masalah internal."
 
         payload = {
             "type": "set_alarm",
@@ -246,23 +289,23 @@ class AssistantFnc(llm.FunctionContext):
         payload_str = json.dumps(payload)
 
         try:
-            logger.info(f"Sending 'set_alarm' command to user {self._current_user_id}: {payload_str}")
+            logger.info("Sending 'set_alarm' command to user %s: %s", self._current_user_id, payload_str)
             await asyncio.wait_for(
                 self._send_data_callback(payload_str),
                 timeout=DEVICE_ACTION_TIMEOUT
             )
-            logger.info(f"Successfully sent 'set_alarm' command for user {self._current_user_id}.")
-            return f"Oke, permintaan untuk menyetel alarm '{message}' pada {date} jam {hour:02d}:{minute:02d} sudah dikirim ke perangkat Anda."
+            logger.info("Successfully sent 'set_alarm' command for user %s.", self._current_user_id)
+            return True, f"Oke, permintaan untuk menyetel alarm '{message}' pada {date} jam {hour:02d}:{minute:02d} sudah dikirim ke perangkat Anda."
 
         except asyncio.TimeoutError:
-            logger.error(f"Timeout waiting for send_data_callback to complete for 'set_alarm'.")
-            return "Maaf, butuh waktu terlalu lama untuk mengirim perintah alarm ke perangkat Anda. Silakan coba lagi."
+            logger.error("Timeout waiting for send_data_callback to complete for 'set_alarm'.")
+            return False, "Maaf, butuh waktu terlalu lama untuk mengirim perintah alarm ke perangkat Anda. Silakan coba lagi."
         except ConnectionError as e:
-             logger.error(f"Connection error sending 'set_alarm' command: {e}")
-             return "Maaf, sepertinya ada masalah koneksi saat mengirim perintah alarm ke perangkat Anda."
+             logger.error("Connection error sending 'set_alarm' command: %s", e)
+             return False, "Maaf, sepertinya ada masalah koneksi saat mengirim perintah alarm ke perangkat Anda."
         except Exception as e:
-            logger.error(f"Failed to send 'set_alarm' command via callback for user {self._current_user_id}: {e}", exc_info=True)
-            return "Maaf, terjadi kesalahan teknis saat mencoba mengirim perintah alarm."
+            logger.error("Failed to send 'set_alarm' command via callback for user %s: %s", self._current_user_id, e, exc_info=True)
+            return False, "Maaf, terjadi kesalahan teknis saat mencoba mengirim perintah alarm."
 
     @llm.ai_callable(description="Search the internet for up-to-date information...")
     async def search_internet(
@@ -275,16 +318,16 @@ class AssistantFnc(llm.FunctionContext):
             logger.warning("LLM called search_internet with empty query.")
             return "Tolong berikan topik atau pertanyaan spesifik yang ingin Anda cari informasinya."
 
-        logger.info(f"LLM requests internet search with query: '{query}'")
+        logger.info("LLM requests internet search with query: '%s'", query)
 
         say_task = None
         if self._assistant_say_callback:
             filler_message = f"Oke, saya coba cari informasi terbaru tentang '{query[:30]}...' ya."
-            logger.info(f"Creating background task to speak filler message: '{filler_message}'")
+            logger.info("Creating background task to speak filler message: '%s'", filler_message)
             try:
                 say_task = asyncio.create_task(self._assistant_say_callback(filler_message))
             except Exception as say_err:
-                logger.error(f"Error creating background task for speaking: {say_err}", exc_info=True)
+                logger.error("Error creating background task for speaking: %s", say_err, exc_info=True)
         else:
             logger.warning("Assistant 'say' callback not available, cannot speak filler message concurrently.")
 
@@ -309,7 +352,11 @@ class AssistantFnc(llm.FunctionContext):
                 ]
             }
 
-            logger.debug(f"Making request to Perplexity API (sonar-medium-online) with data: {json.dumps(data)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Making request to Perplexity API (sonar) with data: %s", json.dumps(data))
+
+            if SEARCH_DIRECT_SPEECH and self._assistant_say_callback:
+                return await self._search_internet_direct(query, headers, data)
 
             async with aiohttp.ClientSession() as session:
                 async with session.post(
@@ -318,43 +365,104 @@ class AssistantFnc(llm.FunctionContext):
                         json=data,
                         timeout=INTERNET_SEARCH_TIMEOUT
                 ) as response:
-                    logger.debug(f"Perplexity API response status: {response.status}")
+                    logger.debug("Perplexity API response status: %s", response.status)
 
                     if response.status == 200:
                         result = await response.json()
-                        logger.debug(f"Successfully received response from Perplexity API: {json.dumps(result)[:200]}...")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Successfully received response from Perplexity API: %.200s...", json.dumps(result))
 
                         if "choices" in result and len(result["choices"]) > 0 and \
                            "message" in result["choices"][0] and "content" in result["choices"][0]["message"]:
                             content = result["choices"][0]["message"]["content"]
-                            logger.info(f"Internet search successful for query: '{query}'. Result length: {len(content)}")
+                            logger.info("Internet search successful for query: '%s'. Result length: %d", query, len(content))
                             return content
                         else:
-                            logger.error(f"Unexpected response structure from Perplexity: {json.dumps(result)}")
+                            logger.error("Unexpected response structure from Perplexity: %s", result)
                             return "Maaf, saya menerima format respons yang tidak terduga dari layanan pencarian."
                     else:
                         error_text = await response.text()
-                        logger.error(f"Error from Perplexity API (Status {response.status}): {error_text}")
-                        if response.status == 401:
-                             return "Maaf, terjadi masalah otentikasi dengan layanan pencarian."
-                        elif response.status == 429:
-                             return "Maaf, batas penggunaan layanan pencarian telah tercapai. Coba lagi nanti."
-                        else:
-                             return f"Maaf, terjadi kesalahan saat mencari informasi (Kode: {response.status})."
+                        logger.error("Error from Perplexity API (Status %s): %s", response.status, error_text)
+                        return _search_error_message(response.status)
 
         except asyncio.TimeoutError:
-             logger.error(f"Internet search timed out after {INTERNET_SEARCH_TIMEOUT}s for query: '{query}'")
+             logger.error("Internet search timed out after %ss for query: '%s'", INTERNET_SEARCH_TIMEOUT, query)
              if say_task and not say_task.done():
                  say_task.cancel()
              return "Maaf, pencarian informasi memakan waktu terlalu lama. Silakan coba lagi."
         except aiohttp.ClientError as e:
-             logger.error(f"Network error during internet search: {e}", exc_info=True)
+             logger.error("Network error during internet search: %s", e, exc_info=True)
              if say_task and not say_task.done():
                  say_task.cancel()
              return "Maaf, terjadi masalah jaringan saat mencoba mencari informasi."
         except Exception as e:
-            error_details = traceback.format_exc()
-            logger.error(f"Exception in search_internet: {str(e)}\n{error_details}")
+            logger.error("Exception in search_internet: %s", e, exc_info=True)
             if say_task and not say_task.done():
                  say_task.cancel()
-            return f"Maaf, terjadi kesalahan tak terduga saat mencoba melakukan pencarian: {str(e)}"
\ No newline at end of file
+            return f"Maaf, terjadi kesalahan tak terduga saat mencoba melakukan pencarian: {str(e)}"
+
+    async def _search_internet_direct(self, query: str, headers: dict, data: dict) -> str:
+        """Streams the Perplexity answer sentence by sentence into the assistant's TTS.
+
+        The spoken answer is kept out of the chat context; only a condensed copy is
+        returned as the tool result so the follow-up completion does not repeat it.
+        """
+        sentences: asyncio.Queue = asyncio.Queue()
+        spoken: List[str] = []
+        speak_task = None
+        start_time = time.time()
+
+        async def speech_source():
+            while (sentence := await sentences.get()) is not None:
+                yield sentence + " "
+
+        headers = dict(headers, Accept="text/event-stream")
+        data = dict(data, stream=True)
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                        "https://api.perplexity.ai/chat/completions",
+                        headers=headers,
+                        json=data,
+                        timeout=INTERNET_SEARCH_TIMEOUT
+                ) as response:
+                    if response.status != 200:
+                        error_text = await response.text()
+                        logger.error("Error from Perplexity API (Status %s): %s", response.status, error_text)
+                        return _search_error_message(response.status)
+
+                    segmenter = SpeechSegmenter()
+                    async for delta in _iter_perplexity_stream(response):
+                        for sentence in segmenter.push(delta):
+                            if speak_task is None:
+                                logger.info("First search sentence ready after %.2fs, starting direct speech.", time.time() - start_time)
+                                speak_task = asyncio.create_task(
+                                    self._assistant_say_callback(speech_source(), allow_interruptions=True, add_to_chat_ctx=False)
+                                )
+                            spoken.append(sentence)
+                            sentences.put_nowait(sentence)
+                    for sentence in segmenter.flush():
+                        spoken.append(sentence)
+                        sentences.put_nowait(sentence)
+                    if spoken and speak_task is None:
+                        speak_task = asyncio.create_task(
+                            self._assistant_say_callback(speech_source(), allow_interruptions=True, add_to_chat_ctx=False)
+                        )
+        finally:
+            sentences.put_nowait(None)
+
+        if not spoken:
+            logger.error("Perplexity stream for query '%s' returned no speakable content.", query)
+            return "Maaf, saya menerima format respons yang tidak terduga dari layanan pencarian."
+
+        logger.info("Direct search answer streamed for query: '%s'. %d sentences in %.2fs", query, len(spoken), time.time() - start_time)
+        condensed = ""
+        for sentence in spoken:
+            if condensed and len(condensed) + len(sentence) > SEARCH_CONTEXT_MAX_CHARS:
+                break
+            condensed = f"{condensed} {sentence}".strip()
+        return (
+            "[Hasil pencarian ini SUDAH dibacakan langsung kepada pengguna. Jangan mengulanginya; "
+            "cukup tanggapi sangat singkat atau tawarkan bantuan lanjutan.]\n"
+            f"Ringkasan hasil: {condensed}"
+        )
@@ -0,0 +1,372 @@
+"""Micro-benchmarks for the agent's per-turn overheads.
+
+Usage: python benchmark.py <name> [options]
+Each benchmark prints a short report; nothing here talks to LiveKit or any API
+unless a --live flag is given.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def _report(title, samples_s, unit_scale=1e6, unit="us"):
+    samples = sorted(samples_s)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{title:<40} mean {statistics.mean(samples) * unit_scale:9.1f}{unit}"
+          f"  p50 {statistics.median(samples) * unit_scale:9.1f}{unit}"
+          f"  p95 {p95 * unit_scale:9.1f}{unit}")
+
+
+def _simulated_turn_logging(log, data_log, job_id, payload, eager):
+    """Roughly the records one user turn emits: a data packet, a tool call and its debug dumps."""
+    data_str = json.dumps(payload)
+    if eager:
+        data_log.info(f"Job {job_id}: Processing data async from user: {data_str[:150]}...")
+        log.info(f"LLM requests internet search with query: '{payload['query']}'")
+        log.debug(f"Making request to Perplexity API with data: {json.dumps(payload)}")
+        log.debug(f"Successfully received response from Perplexity API: {json.dumps(payload)[:200]}...")
+        log.info(f"Internet search successful for query: '{payload['query']}'. Result length: {len(data_str)}")
+        data_log.info(f"Job {job_id}: Successfully sent data payload length {len(data_str)}.")
+    else:
+        data_log.info("Job %s: Processing data async from user: %.150s...", job_id, data_str)
+        log.info("LLM requests internet search with query: '%s'", payload['query'])
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Making request to Perplexity API with data: %s", json.dumps(payload))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Successfully received response from Perplexity API: %.200s...", json.dumps(payload))
+        log.info("Internet search successful for query: '%s'. Result length: %d", payload['query'], len(data_str))
+        data_log.info("Job %s: Successfully sent data payload length %d.", job_id, len(data_str))
+
+
+@benchmark("logging")
+def bench_logging(args):
+    import log_config
+
+    payload = {"type": "search", "query": "berita terbaru hari ini", "items": list(range(200))}
+    root = logging.getLogger()
+    log = logging.getLogger("bench-api")
+    data_log = logging.getLogger(log_config.DATA_LOGGER_NAME)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Baseline: what basicConfig gives us, a synchronous handler on the calling thread.
+        sync_path = os.path.join(tmp, "sync.log")
+        with open(sync_path, "w") as sink:
+            handler = logging.StreamHandler(sink)
+            handler.setFormatter(logging.Formatter(log_config.TEXT_LOG_FORMAT))
+            root.handlers[:] = [handler]
+            root.setLevel(logging.INFO)
+            samples = []
+            for _ in range(args.turns):
+                start = time.perf_counter()
+                _simulated_turn_logging(log, data_log, "job-bench", payload, eager=True)
+                samples.append(time.perf_counter() - start)
+            _report("sync handler, eager f-strings", samples)
+            root.handlers[:] = []
+
+        queued_path = os.path.join(tmp, "queued.log")
+        with open(queued_path, "w") as sink:
+            log_config.configure_logging(level=logging.INFO, json_output=args.json,
+                                         sample_rates={log_config.DATA_LOGGER_NAME: args.sample_data},
+                                         stream=sink)
+            log_config.bind_log_context(job_id="job-bench", user_id="user-bench")
+            samples = []
+            for _ in range(args.turns):
+                start = time.perf_counter()
+                _simulated_turn_logging(log, data_log, "job-bench", payload, eager=False)
+                samples.append(time.perf_counter() - start)
+            drain_start = time.perf_counter()
+            log_config.stop_logging()
+            drain_s = time.perf_counter() - drain_start
+            _report(f"queue handler, lazy ({'json' if args.json else 'text'}, 1/{args.sample_data} data)", samples)
+        print(f"{'listener drain after last turn':<40} {drain_s * 1e3:9.1f}ms")
+        print(f"{'bytes written (sync / queued)':<40} {os.path.getsize(sync_path)} / {os.path.getsize(queued_path)}")
+
+
+def _speech_clip(wav_path, sample_rate=48000):
+    """Returns (int16 samples, sample_rate, channels): the given WAV, or a synthetic utterance."""
+    import wave
+
+    import numpy as np
+
+    if wav_path:
+        with wave.open(wav_path, "rb") as wav:
+            return np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16), wav.getframerate(), wav.getnchannels()
+    # 0.5s silence, 2s of a voiced-like harmonic tone, 0.6s silence.
+    t = np.arange(int(2.0 * sample_rate)) / sample_rate
+    voiced = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 12)) * (0.5 + 0.5 * np.sin(2 * np.pi * 4 * t))
+    clip = np.concatenate([np.zeros(sample_rate // 2), voiced * 6000, np.zeros(int(0.6 * sample_rate))])
+    return clip.astype(np.int16), sample_rate, 1
+
+
+@benchmark("vad")
+def bench_vad(args):
+    import asyncio
+    import random
+
+    from livekit import rtc
+    from livekit.agents import vad as agents_vad
+    from livekit.plugins import silero
+
+    import vad_engine
+
+    clip, sample_rate, channels = _speech_clip(args.wav, sample_rate=16000)
+    frame_samples = sample_rate // 50
+    frames = [rtc.AudioFrame(data=clip[i:i + frame_samples * channels].tobytes(), sample_rate=sample_rate,
+                             num_channels=channels, samples_per_channel=frame_samples)
+              for i in range(0, len(clip) - frame_samples * channels + 1, frame_samples * channels)]
+    frame_s = frame_samples / sample_rate
+    total_frames = int(args.seconds / frame_s)
+
+    async def run_sessions(make_vad):
+        lags = {agents_vad.VADEventType.START_OF_SPEECH: [], agents_vad.VADEventType.END_OF_SPEECH: []}
+        first_events = {}
+
+        async def session(vad):
+            await asyncio.sleep(random.random() * frame_s)
+            stream = vad.stream()
+            started = time.perf_counter()
+
+            async def read():
+                async for event in stream:
+                    if event.type in lags:
+                        # Audio up to event.timestamp was fully pushed at started + timestamp (real-time pacing).
+                        lags[event.type].append(time.perf_counter() - started - event.timestamp)
+                        first_events.setdefault(event.type, event.timestamp)
+
+            reader = asyncio.create_task(read())
+            next_tick = started
+            for i in range(total_frames):
+                stream.push_frame(frames[i % len(frames)])
+                next_tick += frame_s
+                await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+            stream.end_input()
+            await reader
+            await stream.aclose()
+
+        vads = [make_vad() for _ in range(args.sessions)]
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(session(vad) for vad in vads))
+        return lags, first_events, time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+    engine = vad_engine.BatchedVADEngine(max_batch_wait=args.max_wait_ms / 1000)
+    # What each job does today: its own silero.VAD (own ONNX session and executor thread).
+    for label, factory in (("per-job silero plugin", silero.VAD.load),
+                           ("shared batched engine", lambda: vad_engine.SharedVAD(engine=engine))):
+        lags, first_events, cpu_s, wall_s = asyncio.run(run_sessions(factory))
+        for event_type, samples in lags.items():
+            if samples:
+                _report(f"{label} {event_type.name.lower()} lag", samples, unit_scale=1e3, unit="ms")
+                print(f"{'':<40} first at {first_events[event_type] * 1000:.0f}ms of audio")
+            else:
+                print(f"{label} {event_type.name.lower()}: no events (use --wav with real speech)")
+        cores = cpu_s / wall_s
+        print(f"{'':<40} cpu {cores:5.2f} cores for {args.sessions} sessions"
+              f" -> {args.sessions / max(cores, 1e-9):7.1f} sessions/core")
+    print(f"{'engine mean batch size':<40} {engine.windows_run / max(engine.batches_run, 1):9.1f}")
+    engine.close()
+
+
+@benchmark("stt")
+def bench_stt(args):
+    from livekit import rtc
+
+    import stt_preprocess
+    import vad_engine
+
+    clip, sample_rate, channels = _speech_clip(args.wav)
+    data = clip.tobytes()
+    frame = rtc.AudioFrame(data=data, sample_rate=sample_rate, num_channels=channels,
+                           samples_per_channel=len(data) // (2 * channels))
+
+    model = vad_engine.SileroModel()
+    for audio_format in stt_preprocess.STT_UPLOAD_FORMATS:
+        samples = []
+        upload = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            upload = stt_preprocess.prepare_upload(frame, model, audio_format)
+            samples.append(time.perf_counter() - start)
+        _report(f"prepare {audio_format}", samples, unit_scale=1e3, unit="ms")
+        if upload is None:
+            print(f"{'':<40} no speech detected, upload skipped")
+        else:
+            print(f"{'':<40} {upload.raw_bytes} -> {len(upload.payload)} bytes"
+                  f" ({100 * len(upload.payload) / upload.raw_bytes:.0f}%),"
+                  f" audio {upload.input_duration:.2f}s -> {upload.trimmed_duration:.2f}s")
+
+
+@benchmark("tts")
+def bench_tts(args):
+    import asyncio
+    import io
+
+    import av
+    import numpy as np
+    from livekit.agents import utils
+
+    import pcm_tts
+
+    rate = pcm_tts.OPENAI_PCM_SAMPLE_RATE
+    t = np.arange(int(args.seconds * rate)) / rate
+    speech = (np.sin(2 * np.pi * 180 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)) * 8000).astype(np.int16)
+    pcm = speech.tobytes()
+
+    encoded = io.BytesIO()
+    with av.open(encoded, mode="w", format=args.format) as container:
+        stream = container.add_stream("libmp3lame" if args.format == "mp3" else "libopus", rate=rate if args.format == "mp3" else 48000, layout="mono")
+        frame = av.AudioFrame.from_ndarray(speech.reshape(1, -1), format="s16", layout="mono")
+        frame.sample_rate = rate
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    compressed = encoded.getvalue()
+    chunk = 4096
+
+    def decode_compressed():
+        # Decode the compressed response and slice it into frames, as the plugin does.
+        decoder = av.open(io.BytesIO(compressed), mode="r")
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=rate)
+        byte_stream = utils.audio.AudioByteStream(sample_rate=rate, num_channels=1)
+        for decoded in decoder.decode(audio=0):
+            for resampled in resampler.resample(decoded):
+                byte_stream.write(resampled.to_ndarray().tobytes())
+        byte_stream.flush()
+        decoder.close()
+
+    def frame_pcm():
+        byte_stream = utils.audio.AudioByteStream(sample_rate=rate, num_channels=1,
+                                                  samples_per_channel=pcm_tts.PCM_FRAME_SAMPLES)
+        for offset in range(0, len(pcm), chunk):
+            byte_stream.write(pcm[offset:offset + chunk])
+        byte_stream.flush()
+
+    for label, fn in ((f"{args.format} decode path", decode_compressed), ("raw pcm path", frame_pcm)):
+        samples = []
+        for _ in range(args.repeat):
+            start = time.process_time()
+            fn()
+            samples.append((time.process_time() - start) / args.seconds)
+        _report(f"{label} cpu per 1s of speech", samples, unit_scale=1e3, unit="ms")
+    print(f"{'bytes per second of speech':<40} {args.format} {len(compressed) / args.seconds:.0f} / pcm {len(pcm) / args.seconds:.0f}")
+
+    if not args.live:
+        return
+
+    from livekit.plugins import openai as openai_plugin
+
+    async def first_frame(tts_plugin):
+        start = time.perf_counter()
+        async with tts_plugin.synthesize(args.text) as stream:
+            async for _ in stream:
+                return time.perf_counter() - start
+
+    async def run_live():
+        for label, make in (("openai.TTS", lambda: openai_plugin.TTS(voice="nova")), ("PCMTTS", lambda: pcm_tts.PCMTTS(voice="nova"))):
+            _report(f"{label} time to first frame", [await first_frame(make()) for _ in range(args.live)], unit_scale=1e3, unit="ms")
+
+    asyncio.run(run_live())
+
+
+@benchmark("segmentation")
+def bench_segmentation(args):
+    import asyncio
+    import re
+
+    from livekit.agents import tokenize
+
+    import speech_text
+
+    # LLM-sized deltas: a word plus its trailing punctuation/space.
+    deltas = re.findall(r"\S+\s*", args.text)
+
+    async def first_chunk(tokenizer):
+        stream = tokenizer.stream()
+        start = time.perf_counter()
+
+        async def push():
+            for delta in deltas:
+                stream.push_text(delta)
+                await asyncio.sleep(args.token_ms / 1000)
+            stream.end_input()
+
+        pusher = asyncio.create_task(push())
+        chunks = []
+        first_at = None
+        async for data in stream:
+            if first_at is None:
+                first_at = time.perf_counter() - start
+            chunks.append(data.token)
+        await pusher
+        await stream.aclose()
+        return first_at, chunks
+
+    async def run():
+        for label, make in (("basic SentenceTokenizer", tokenize.basic.SentenceTokenizer),
+                            ("IndonesianSentenceTokenizer", speech_text.IndonesianSentenceTokenizer)):
+            samples = []
+            chunks = []
+            for _ in range(args.repeat):
+                first_at, chunks = await first_chunk(make())
+                samples.append(first_at)
+            _report(f"{label} first LLM token -> TTS", samples, unit_scale=1e3, unit="ms")
+            for chunk in chunks:
+                print(f"    | {chunk}")
+
+    print(f"{len(deltas)} deltas at {args.token_ms:.0f}ms each")
+    asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="name", required=True)
+
+    p = sub.add_parser("logging", help="caller-side logging cost per simulated turn")
+    p.add_argument("--turns", type=int, default=2000)
+    p.add_argument("--json", action="store_true", help="use the structured JSON formatter")
+    p.add_argument("--sample-data", type=int, default=10, help="keep 1 of every N agent-data records")
+
+    p = sub.add_parser("vad", help="speech start/end event lag: per-job Silero plugin vs shared batched VAD engine")
+    p.add_argument("--sessions", type=int, default=32)
+    p.add_argument("--seconds", type=float, default=10.0, help="audio per session, paced in real time")
+    p.add_argument("--max-wait-ms", type=float, default=1.0, help="how long the engine waits to grow a batch")
+    p.add_argument("--wav", help="16-bit PCM WAV utterance to loop instead of the synthetic clip")
+
+    p = sub.add_parser("stt", help="bytes uploaded per utterance with silence trimming and compression")
+    p.add_argument("--wav", help="16-bit PCM WAV utterance to use instead of the synthetic clip")
+    p.add_argument("--repeat", type=int, default=20)
+
+    p = sub.add_parser("tts", help="decode CPU per second of speech and TTS time to first frame")
+    p.add_argument("--seconds", type=float, default=5.0)
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--format", choices=("mp3", "ogg"), default="mp3", help="compressed format to compare against")
+    p.add_argument("--live", type=int, default=0, metavar="N", help="also time N real requests per plugin (needs OPENAI_API_KEY)")
+    p.add_argument("--text", default="Halo, saya Anty. Ada yang bisa saya bantu hari ini?")
+
+    p = sub.add_parser("segmentation", help="time from first LLM token to first TTS request per sentence tokenizer")
+    p.add_argument("--token-ms", type=float, default=30.0, help="simulated delay between LLM deltas")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--text", default="Baik, Bpk. Budi, alarmnya sudah saya pasang untuk jam tujuh pagi. "
+                                      "Jangan lupa bawa dokumen, laptop, charger, dll. sebelum berangkat ke kantor. "
+                                      "Kalau ada yang perlu diubah, bilang saja ya!")
+
+    args = parser.parse_args()
+    BENCHMARKS[args.name](args)
+
+
+if __name__ == "__main__":
+    main()
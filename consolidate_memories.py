@@ -0,0 +1,278 @@
+"""Offline consolidation of a user's Mem0 store.
+
+Run outside agent sessions, e.g. nightly:
+    python consolidate_memories.py --user-id <uid> [--apply]
+    python consolidate_memories.py --all-users --apply
+
+Per user it groups memories by metadata.category, merges near-duplicates into
+the most recent one, expires entries past their category's TTL, and folds the
+newest facts of each category into a single canonical profile memory; folded
+facts are deleted as separate memories (the profile carries them in its
+metadata for the next run). Without --apply it only reports the plan.
+"""
+import argparse
+import logging
+import re
+import statistics
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from log_config import configure_logging
+
+logger = logging.getLogger("memory-consolidation")
+
+SIMILARITY_THRESHOLD = 0.85
+# Days after which memories in these categories no longer describe the user.
+CATEGORY_TTL_DAYS = {"concerns": 90, "meeting_schedule": 30, "important_dates": 365, "feedback": 180}
+# Categories where only the latest value is true (e.g. a corrected name).
+SINGLE_VALUE_TYPES = {("personal_details", "name")}
+PROFILE_CATEGORY = "profile"
+PROFILE_TYPE = "canonical_profile"
+PROFILE_MAX_ITEMS_PER_CATEGORY = 3
+SEARCH_SAMPLES = 5
+
+_PREFIX_RE = re.compile(r"^user shared information related to '[^']*':\s*", re.IGNORECASE)
+_TOKEN_RE = re.compile(r"\w+")
+_UNKNOWN_TIME = datetime.min.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class ConsolidationPlan:
+    user_id: str
+    total: int = 0
+    deletes: List[str] = field(default_factory=list)
+    merged: int = 0
+    expired: int = 0
+    profile_text: Optional[str] = None
+    profile_facts: List[dict] = field(default_factory=list)
+    # Existing profile entries, replaced by the new one.
+    profile_ids: List[str] = field(default_factory=list)
+    # Memories folded into the profile; deleted only after it is stored.
+    absorbed: List[str] = field(default_factory=list)
+    # Facts from the old profile that no longer fit in it; re-added as standalone memories.
+    restores: List[dict] = field(default_factory=list)
+
+
+def _memory_text(memory: dict) -> str:
+    return (memory.get("memory") or "").strip()
+
+
+def _normalized(text: str) -> str:
+    return " ".join(_TOKEN_RE.findall(_PREFIX_RE.sub("", text).lower()))
+
+
+def _split_numbers(text: str) -> Tuple[List[str], str]:
+    """Separates digit tokens (dates, ages, amounts) from the words around them."""
+    tokens = text.split()
+    numbers = sorted(t for t in tokens if any(ch.isdigit() for ch in t))
+    return numbers, " ".join(t for t in tokens if not any(ch.isdigit() for ch in t))
+
+
+def _similarity(a: str, b: str) -> float:
+    """Fuzzy similarity of two normalized texts; 0 when their numbers differ at all."""
+    numbers_a, words_a = _split_numbers(a)
+    numbers_b, words_b = _split_numbers(b)
+    if numbers_a != numbers_b:
+        return 0.0
+    tokens_a, tokens_b = set(words_a.split()), set(words_b.split())
+    jaccard = len(tokens_a & tokens_b) / max(len(tokens_a | tokens_b), 1)
+    return max(jaccard, SequenceMatcher(None, words_a, words_b).ratio())
+
+
+def _timestamp(memory: dict) -> Optional[datetime]:
+    for key in ("updated_at", "created_at"):
+        value = memory.get(key)
+        if value:
+            try:
+                parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+                return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+            except ValueError:
+                continue
+    return None
+
+
+def _category(memory: dict) -> str:
+    metadata = memory.get("metadata") or {}
+    return metadata.get("category") or "uncategorized"
+
+
+def _profile_fact_memories(profile: dict) -> List[dict]:
+    """Facts a previous run folded into the profile, as memory-like dicts without an id."""
+    facts = (profile.get("metadata") or {}).get("facts") or []
+    return [{"id": None, "memory": fact.get("text", ""), "updated_at": fact.get("ts"),
+             "metadata": {"category": fact.get("category"), "type": fact.get("type")}}
+            for fact in facts if isinstance(fact, dict) and fact.get("text")]
+
+
+def plan_consolidation(user_id: str, memories: List[dict], now: Optional[datetime] = None) -> ConsolidationPlan:
+    """Decides which memories to delete and what the canonical profile should say.
+
+    Memories without a usable timestamp are never expired.
+    """
+    now = now or datetime.now(timezone.utc)
+    plan = ConsolidationPlan(user_id=user_id, total=len(memories))
+    by_category: Dict[str, List[dict]] = {}
+    for memory in memories:
+        metadata = memory.get("metadata") or {}
+        candidates = [memory]
+        if metadata.get("type") == PROFILE_TYPE:
+            plan.profile_ids.append(memory["id"])
+            candidates = _profile_fact_memories(memory)
+        for candidate in candidates:
+            by_category.setdefault(_category(candidate), []).append(candidate)
+
+    def drop(memory: dict) -> None:
+        if memory.get("id"):
+            plan.deletes.append(memory["id"])
+
+    kept: Dict[str, List[dict]] = {}
+    for category, items in by_category.items():
+        items.sort(key=lambda m: _timestamp(m) or _UNKNOWN_TIME, reverse=True)
+        ttl_days = CATEGORY_TTL_DAYS.get(category)
+        seen_single_types = set()
+        clusters: List[str] = []
+        for memory in items:
+            text = _normalized(_memory_text(memory))
+            memory_type = (memory.get("metadata") or {}).get("type")
+            timestamp = _timestamp(memory)
+            if ttl_days is not None and timestamp is not None and now - timestamp > timedelta(days=ttl_days):
+                drop(memory)
+                plan.expired += 1
+                continue
+            if (category, memory_type) in SINGLE_VALUE_TYPES:
+                if memory_type in seen_single_types:
+                    drop(memory)
+                    plan.merged += 1
+                    continue
+                seen_single_types.add(memory_type)
+            if not text or any(_similarity(text, representative) >= SIMILARITY_THRESHOLD for representative in clusters):
+                # Newer near-duplicate already kept (items are newest first).
+                drop(memory)
+                plan.merged += 1
+                continue
+            clusters.append(text)
+            kept.setdefault(category, []).append(memory)
+
+    lines = []
+    for category in sorted(kept):
+        folded = kept[category][:PROFILE_MAX_ITEMS_PER_CATEGORY]
+        facts = [_PREFIX_RE.sub("", _memory_text(m)) for m in folded]
+        lines.append(f"{category.replace('_', ' ')}: " + "; ".join(facts))
+        for memory, fact in zip(folded, facts):
+            timestamp = _timestamp(memory)
+            plan.profile_facts.append({"category": category, "type": (memory.get("metadata") or {}).get("type"),
+                                       "text": fact, "ts": timestamp.isoformat() if timestamp else None})
+            if memory.get("id"):
+                plan.absorbed.append(memory["id"])
+        for memory in kept[category][PROFILE_MAX_ITEMS_PER_CATEGORY:]:
+            if not memory.get("id"):
+                plan.restores.append({"category": category, "type": (memory.get("metadata") or {}).get("type"),
+                                      "text": _memory_text(memory)})
+    if lines:
+        plan.profile_text = "Canonical user profile. " + " | ".join(lines)
+    elif plan.profile_ids:
+        # Nothing left to profile: the old profile goes too.
+        plan.deletes.extend(plan.profile_ids)
+        plan.profile_ids = []
+    return plan
+
+
+def _get_all(client, user_id: str) -> List[dict]:
+    result = client.get_all(user_id=user_id)
+    if isinstance(result, dict):
+        result = result.get("results", [])
+    return [m for m in result or [] if isinstance(m, dict) and m.get("id")]
+
+
+def _search_latency(client, user_id: str) -> float:
+    from api import SEMANTIC_QUERY_GENERAL_STARTUP
+
+    samples = []
+    for _ in range(SEARCH_SAMPLES):
+        start = time.perf_counter()
+        client.search(query=SEMANTIC_QUERY_GENERAL_STARTUP, user_id=user_id, limit=5)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def consolidate_user(client, user_id: str, apply: bool) -> ConsolidationPlan:
+    memories = _get_all(client, user_id)
+    chars_before = sum(len(_memory_text(m)) for m in memories)
+    latency_before = _search_latency(client, user_id) if memories else 0.0
+    plan = plan_consolidation(user_id, memories)
+    logger.info("User %s: %d memories (%d chars); plan deletes %d (%d merged, %d expired), "
+                "folds %d into the canonical profile, restores %d from it.",
+                user_id, plan.total, chars_before, len(plan.deletes), plan.merged, plan.expired, len(plan.absorbed),
+                len(plan.restores))
+    if not apply:
+        return plan
+
+    deletes = list(plan.deletes)
+    if plan.profile_text:
+        try:
+            # Stored verbatim: with inference Mem0 may rewrite or split it and lose the profile metadata.
+            client.add([{"role": "user", "content": plan.profile_text}], user_id=user_id, infer=False,
+                       metadata={'category': PROFILE_CATEGORY, 'type': PROFILE_TYPE, 'facts': plan.profile_facts})
+            deletes += plan.absorbed
+        except Exception as e:
+            logger.error("User %s: failed to store canonical profile, keeping the facts it would absorb: %s", user_id, e)
+        else:
+            restored = 0
+            for fact in plan.restores:
+                try:
+                    client.add([{"role": "user", "content": fact["text"]}], user_id=user_id, infer=False,
+                               metadata={'category': fact["category"], 'type': fact["type"]})
+                    restored += 1
+                except Exception as e:
+                    logger.error("User %s: failed to restore profile fact '%.80s': %s", user_id, fact["text"], e)
+            if restored == len(plan.restores):
+                deletes += plan.profile_ids
+            else:
+                logger.warning("User %s: keeping the old profile until all of its facts are restored.", user_id)
+    for memory_id in deletes:
+        try:
+            client.delete(memory_id)
+        except Exception as e:
+            logger.error("User %s: failed to delete memory %s: %s", user_id, memory_id, e)
+
+    after = _get_all(client, user_id)
+    logger.info("User %s: store %d -> %d memories, %d -> %d chars; startup search p50 %.0fms -> %.0fms.",
+                user_id, len(memories), len(after), chars_before, sum(len(_memory_text(m)) for m in after),
+                latency_before * 1000, _search_latency(client, user_id) * 1000 if after else 0.0)
+    return plan
+
+
+def _all_user_ids(client) -> List[str]:
+    result = client.users()
+    entries = result.get("results", []) if isinstance(result, dict) else result or []
+    return [entry["name"] for entry in entries if isinstance(entry, dict) and entry.get("type", "user") == "user" and entry.get("name")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--user-id", action="append", help="user to consolidate (repeatable)")
+    target.add_argument("--all-users", action="store_true", help="every user in the Mem0 project")
+    parser.add_argument("--apply", action="store_true", help="actually delete/update; default is a dry run")
+    args = parser.parse_args()
+
+    load_dotenv()
+    configure_logging(level=logging.INFO)
+    from mem0 import MemoryClient
+    client = MemoryClient()
+    user_ids = _all_user_ids(client) if args.all_users else args.user_id
+    logger.info("Consolidating %d users (%s).", len(user_ids), "apply" if args.apply else "dry run")
+    for user_id in user_ids:
+        try:
+            consolidate_user(client, user_id, args.apply)
+        except Exception as e:
+            logger.error("User %s: consolidation failed: %s", user_id, e, exc_info=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from typing import Dict, List, Optional, TextIO
+
+TEXT_LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATA_LOGGER_NAME = "agent-data"
+
+_job_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("log_job_id", default=None)
+_user_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("log_user_id", default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+_root_level = logging.INFO
+_listener_lock = threading.Lock()
+
+
+def bind_log_context(job_id: Optional[str] = None, user_id: Optional[str] = None) -> List[contextvars.Token]:
+    """Attach job_id/user_id to every record logged from the current task/context.
+
+    Returns the tokens for reset_log_context(); code that reuses its thread or
+    context for unrelated work (e.g. a WSGI request thread) must reset them.
+    """
+    tokens = []
+    if job_id is not None:
+        tokens.append(_job_id_var.set(job_id))
+    if user_id is not None:
+        tokens.append(_user_id_var.set(user_id))
+    return tokens
+
+
+def reset_log_context(tokens: List[contextvars.Token]) -> None:
+    """Undo a bind_log_context() call, most recent binding first."""
+    for token in reversed(tokens):
+        token.var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the bound job_id/user_id onto the record.
+
+    Runs in the caller's thread (it is attached to the queue handler), because
+    contextvars are not visible from the listener thread.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "job_id"):
+            record.job_id = _job_id_var.get()
+        if not hasattr(record, "user_id"):
+            record.user_id = _user_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Lets through 1 of every N records below WARNING, counted per message template.
+
+    WARNING and above are never sampled away.
+    """
+
+    def __init__(self, every: int):
+        super().__init__()
+        self._every = max(1, int(every))
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self._every == 1 or record.levelno >= logging.WARNING:
+            return True
+        key = str(record.msg)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        if count % self._every:
+            return False
+        record.sampled_every = self._every
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "job_id": getattr(record, "job_id", None),
+            "user_id": getattr(record, "user_id", None),
+        }
+        sampled_every = getattr(record, "sampled_every", None)
+        if sampled_every:
+            entry["sampled_every"] = sampled_every
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    The stock QueueHandler.prepare() renders the message (and traceback) in the
+    caller so records can be pickled; our queue never leaves the process, so the
+    %-args are rendered off the event loop instead.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(level: int = logging.INFO, json_output: Optional[bool] = None,
+                      sample_rates: Optional[Dict[str, int]] = None,
+                      stream: Optional[TextIO] = None) -> logging.handlers.QueueListener:
+    """Route all logging through a queue drained by a background thread.
+
+    json_output defaults to LOG_FORMAT=json; sample_rates maps logger names to
+    "keep 1 of every N" for high-rate INFO/DEBUG messages (LOG_SAMPLE_DATA sets
+    the rate for the agent-data logger).
+    """
+    global _listener, _queue_handler, _root_level
+    with _listener_lock:
+        if _listener is not None:
+            return _listener
+
+        if json_output is None:
+            json_output = os.getenv("LOG_FORMAT", "text").lower() == "json"
+        if sample_rates is None:
+            sample_rates = {DATA_LOGGER_NAME: int(os.getenv("LOG_SAMPLE_DATA", "10"))}
+
+        stream_handler = logging.StreamHandler(stream or sys.stderr)
+        stream_handler.setFormatter(JsonFormatter() if json_output else logging.Formatter(TEXT_LOG_FORMAT))
+
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        _queue_handler = LazyQueueHandler(log_queue)
+        _queue_handler.addFilter(ContextFilter())
+        _root_level = level
+        _install_queue_handler()
+
+        for logger_name, every in sample_rates.items():
+            logging.getLogger(logger_name).addFilter(SamplingFilter(every))
+
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        return _listener
+
+
+def _install_queue_handler() -> None:
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if handler is not _queue_handler:
+            root.removeHandler(handler)
+    if _queue_handler not in root.handlers:
+        root.addHandler(_queue_handler)
+    root.setLevel(_root_level)
+
+
+def reclaim_root_logger() -> None:
+    """Make the queue handler the root logger's only handler again.
+
+    The LiveKit cli adds its own synchronous StreamHandler to the root logger
+    when the worker starts, and job processes get a handler that forwards
+    records to the parent; with ours also attached every record would be
+    printed twice. Call this once the framework's setup has run (prewarm,
+    request_fnc, entrypoint). Does nothing if configure_logging() was not used.
+    """
+    with _listener_lock:
+        if _listener is not None:
+            _install_queue_handler()
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
@@ -8,17 +8,26 @@ import time
 from typing import AsyncGenerator, Optional, Callable, Awaitable
 
 from openai import AsyncOpenAI
-from livekit.agents import AutoSubscribe, JobContext, WorkerOptions, cli, llm
+from livekit.agents import AutoSubscribe, JobContext, JobExecutorType, JobProcess, JobRequest, WorkerOptions, cli, llm, tts
 from livekit.rtc import DataPacket, DataPacketKind, RemoteParticipant, ConnectionState, Room
 from livekit.agents.voice_assistant import VoiceAssistant
 from livekit.plugins import openai, silero, groq
 from livekit import api
 
-from api import AssistantFnc
+from api import AssistantFnc, SEMANTIC_QUERY_GENERAL_STARTUP
+from log_config import configure_logging, bind_log_context, reclaim_root_logger, DATA_LOGGER_NAME
+from vad_engine import BatchedVADEngine, SharedVAD, SileroModel
+from stt_preprocess import PreprocessedGroqSTT
+from transcript_hooks import TranscriptHookSTT
+from memory_prefetch import MemoryPrefetcher, MEMORY_PREFETCH_LIMIT
+from alarm_intent import AlarmFastPath
+from pcm_tts import PCMTTS
+from speech_text import IndonesianSentenceTokenizer
 from mem0 import MemoryClient
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+configure_logging(level=logging.INFO)
 logger = logging.getLogger(__name__)
+data_logger = logging.getLogger(DATA_LOGGER_NAME)
 logging.getLogger('livekit').setLevel(logging.WARNING)
 logging.getLogger('websockets').setLevel(logging.WARNING)
 logging.getLogger('mem0').setLevel(logging.INFO)
@@ -42,29 +51,38 @@ if not os.getenv("PERPLEXITY_API_KEY"):
 if not os.getenv("OPENAI_API_KEY"):
     logger.error("FATAL: OPENAI_API_KEY not found.")
 
-SEMANTIC_QUERY_GENERAL_STARTUP = (
-    "Key points, facts, preferences, user's name, user's recent mood, "
-    "and user's recent concerns shared in previous conversations"
-)
 MEM0_SEARCH_TIMEOUT = 15.0
 LLM_GREETING_TIMEOUT = 10.0
+# Run jobs as threads of one worker process so they can share a single batched VAD model.
+USE_SHARED_VAD = os.getenv('SHARED_VAD', 'false').lower() == 'true'
+# Trim silence and upload 16 kHz mono FLAC/Opus to Groq instead of the raw VAD segment as WAV.
+USE_STT_PREPROCESS = os.getenv('STT_PREPROCESS', 'false').lower() == 'true'
+STT_UPLOAD_FORMAT = os.getenv('STT_UPLOAD_FORMAT', 'flac').lower()
+# Search Mem0 with each user transcript and inject the hits before the LLM call, instead of waiting for recall_memories.
+USE_MEMORY_PREFETCH = os.getenv('MEMORY_PREFETCH', 'true').lower() == 'true'
+# Parse Indonesian alarm commands locally; send unambiguous ones without an LLM round-trip.
+USE_ALARM_FAST_PATH = os.getenv('ALARM_FAST_PATH', 'true').lower() == 'true'
+# Request raw PCM from OpenAI TTS and frame it as it streams, instead of decoding a compressed response.
+USE_PCM_TTS = os.getenv('TTS_PCM_OUTPUT', 'true').lower() == 'true'
+# Feed TTS clause by clause with an Indonesian-aware tokenizer instead of the default English sentence splitter.
+USE_ID_SEGMENTATION = os.getenv('TTS_ID_SEGMENTATION', 'true').lower() == 'true'
 
 async def search_mem0_with_timeout(client: Optional[MemoryClient], user_id: str, query: str, limit: int = 5):
     if not client:
-        logger.warning(f"Mem0 search skipped for user '{user_id}': client not available.")
+        logger.warning("Mem0 search skipped for user '%s': client not available.", user_id)
         return None
     try:
         start_time = time.time()
-        logger.debug(f"Starting Mem0 search for user '{user_id}' (limit: {limit})")
+        logger.debug("Starting Mem0 search for user '%s' (limit: %d)", user_id, limit)
         search_coro = asyncio.to_thread(client.search, user_id=user_id, query=query, limit=limit)
         result = await asyncio.wait_for(search_coro, timeout=MEM0_SEARCH_TIMEOUT)
-        logger.debug(f"Finished Mem0 search in {time.time() - start_time:.2f}s")
+        logger.debug("Finished Mem0 search in %.2fs", time.time() - start_time)
         return result
     except asyncio.TimeoutError:
-        logger.warning(f"Mem0 search timed out after {MEM0_SEARCH_TIMEOUT}s for user '{user_id}'")
+        logger.warning("Mem0 search timed out after %ss for user '%s'", MEM0_SEARCH_TIMEOUT, user_id)
         return None
     except Exception as e:
-        logger.error(f"Error during Mem0 search for user '{user_id}': {e}", exc_info=True)
+        logger.error("Error during Mem0 search for user '%s': %s", user_id, e, exc_info=True)
         return None
 
 async def generate_summary_with_llm(llm_plugin: Optional[llm.LLM], transcript: str) -> str:
@@ -79,24 +97,26 @@ async def generate_summary_with_llm(llm_plugin: Optional[llm.LLM], transcript: s
         f"Transkrip:\n{transcript}\n\n---\nRingkasan:"
     )
     try:
-        logger.info(f"Requesting summary via DIRECT OpenAI API call (Model: {MODEL_TO_USE})...")
+        logger.info("Requesting summary via DIRECT OpenAI API call (Model: %s)...", MODEL_TO_USE)
         client = AsyncOpenAI(api_key=api_key)
         response = await client.chat.completions.create(model=MODEL_TO_USE, messages=[{"role": "user", "content": summary_prompt}], stream=False)
         if response.choices and response.choices[0].message and response.choices[0].message.content:
             summary = response.choices[0].message.content.strip()
-            logger.info(f"Direct API summary generated. Length: {len(summary)}")
+            logger.info("Direct API summary generated. Length: %d", len(summary))
             return summary or "Model AI tidak dapat menghasilkan ringkasan (via direct call)."
         else:
-            logger.error(f"Unexpected response structure from direct OpenAI call: {response}")
+            logger.error("Unexpected response structure from direct OpenAI call: %s", response)
             return "Error: Struktur respons tidak terduga dari API OpenAI."
     except Exception as e:
-        logger.error(f"Error during DIRECT OpenAI API summarization: {e}", exc_info=True)
+        logger.error("Error during DIRECT OpenAI API summarization: %s", e, exc_info=True)
         return f"Error saat membuat ringkasan (direct call): {type(e).__name__}"
 
 async def entrypoint(ctx: JobContext):
     start_entrypoint_time = time.time()
     ephemeral_room_name = ctx.room.name
     job_id = ctx.job.id
+    reclaim_root_logger()
+    bind_log_context(job_id=job_id)
     logger.info(f"Initializing agent for ephemeral room: {ephemeral_room_name} (Job ID: {job_id})")
 
     local_mem0_client = None
@@ -116,6 +136,8 @@ async def entrypoint(ctx: JobContext):
     llm_plugin_for_va: Optional[openai.LLM] = None
     assistant_fnc: Optional[AssistantFnc] = None
     persistent_user_id: Optional[str] = None
+    memory_prefetcher: Optional[MemoryPrefetcher] = None
+    alarm_fast_path: Optional[AlarmFastPath] = None
 
     try:
         try:
@@ -143,56 +165,57 @@ async def entrypoint(ctx: JobContext):
 
         async def send_data_to_client(data: str):
             if not ctx.room or not ctx.room.local_participant:
-                logger.error(f"Job {job_id}: Cannot send data: Room or local participant not available.")
+                logger.error("Job %s: Cannot send data: Room or local participant not available.", job_id)
                 raise ConnectionError("Room or local participant not available for sending data.")
-            logger.debug(f"Job {job_id}: Attempting to send data: {data[:100]}...")
+            data_logger.debug("Job %s: Attempting to send data: %.100s...", job_id, data)
             try:
                 await ctx.room.local_participant.publish_data(payload=data.encode('utf-8'))
-                logger.info(f"Job {job_id}: Successfully sent data payload length {len(data)}.")
+                data_logger.info("Job %s: Successfully sent data payload length %d.", job_id, len(data))
             except Exception as e:
-                logger.error(f"Job {job_id}: Failed to publish data: {e}", exc_info=True)
+                logger.error("Job %s: Failed to publish data: %s", job_id, e, exc_info=True)
                 raise
 
         async def _handle_data_async(data: DataPacket, participant: Optional[RemoteParticipant]):
             participant_identity = getattr(participant, 'identity', 'Unknown')
+            bind_log_context(job_id=job_id, user_id=persistent_user_id)
             try:
                 data_str = data.data.decode('utf-8')
-                logger.info(f"Job {job_id}: Processing data async from {participant_identity}: {data_str[:150]}...")
+                data_logger.info("Job %s: Processing data async from %s: %.150s...", job_id, participant_identity, data_str)
                 json_data = json.loads(data_str)
                 msg_type = json_data.get("type")
 
                 if msg_type == "summarize_meeting":
                     transcript = json_data.get("transcript")
                     if transcript:
-                        logger.info(f"Job {job_id}: Summarization request received. Generating summary async...")
+                        logger.info("Job %s: Summarization request received. Generating summary async...", job_id)
                         summary_text = await generate_summary_with_llm(None, transcript)
-                        logger.info(f"Job {job_id}: Summary generated: '{summary_text[:100]}...'")
+                        logger.info("Job %s: Summary generated: '%.100s...'", job_id, summary_text)
                         response_payload = json.dumps({"type": "meeting_summary_result", "summary": summary_text, "original_transcript": transcript})
                         speak_task = None
                         if assistant:
                             speak_task = asyncio.create_task(assistant.say(summary_text, allow_interruptions=True))
                         else:
-                            logger.warning(f"Job {job_id}: Assistant object not available, cannot speak summary.")
+                            logger.warning("Job %s: Assistant object not available, cannot speak summary.", job_id)
                         send_task = asyncio.create_task(send_data_to_client(response_payload))
                         try:
                             await send_task
                         except Exception as send_e:
-                            logger.error(f"Job {job_id}: Error sending summary result: {send_e}", exc_info=True)
+                            logger.error("Job %s: Error sending summary result: %s", job_id, send_e, exc_info=True)
                     else:
-                        logger.warning(f"Job {job_id}: Summarize request received async without transcript.")
+                        logger.warning("Job %s: Summarize request received async without transcript.", job_id)
 
             except json.JSONDecodeError:
-                logger.error(f"Job {job_id}: Failed to decode JSON data async from {participant_identity}")
+                logger.error("Job %s: Failed to decode JSON data async from %s", job_id, participant_identity)
             except Exception as e:
-                logger.error(f"Job {job_id}: Error processing data async from {participant_identity}: {e}", exc_info=True)
+                logger.error("Job %s: Error processing data async from %s: %s", job_id, participant_identity, e, exc_info=True)
 
         def _handle_data_sync(data: DataPacket, participant: Optional[RemoteParticipant] = None):
             participant_identity = getattr(participant, 'identity', 'None')
-            logger.debug(f"Job {job_id}: Sync data handler triggered (participant: {participant_identity})")
+            data_logger.debug("Job %s: Sync data handler triggered (participant: %s)", job_id, participant_identity)
             if participant and isinstance(participant, RemoteParticipant):
                 asyncio.create_task(_handle_data_async(data, participant))
             else:
-                logger.warning(f"Job {job_id}: Sync handler: Data received, but not from a RemoteParticipant or participant is None.")
+                logger.warning("Job %s: Sync handler: Data received, but not from a RemoteParticipant or participant is None.", job_id)
 
         logger.info(f"Job {job_id}: Connecting to LiveKit room...")
         await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
@@ -201,6 +224,7 @@ async def entrypoint(ctx: JobContext):
         ctx.room.on("data_received", _handle_data_sync)
         logger.info(f"Job {job_id}: Registered synchronous data received handler.")
 
+        bind_log_context(user_id=persistent_user_id)
         logger.info(f"Job {job_id}: Using persistent user_id for session: {persistent_user_id}")
 
         logger.info(f"Job {job_id}: Initializing Assistant Function Context...")
@@ -222,7 +246,7 @@ async def entrypoint(ctx: JobContext):
                         try:
                             parts = mem_text.lower().split("name is", 1)
                             if len(parts) > 1:
-                                potential_name = parts[1].strip().split()[0].rstrip('.?!,').capitalize()
+                                potential_name = parts[1].strip().split()[0].rstrip('.?!,;|').capitalize()
                                 if potential_name:
                                     user_name = potential_name
                                     logger.info(f"Job {job_id}: Tentatively extracted user name: {user_name}")
@@ -252,7 +276,7 @@ async def entrypoint(ctx: JobContext):
             "- Gunakan respons singkat dan ringkas, hindari penggunaan tanda baca yang sulit diucapkan.\n"
             "- Jaga agar respons tetap ringkas dan percakapan dalam Bahasa Indonesia.\n"
             "- Bersikaplah empatik dan suportif secara alami.\n"
-            "- Gunakan fungsi memori untuk mempersonalisasi percakapan.\n"
+            "- Gunakan fungsi memori untuk mempersonalisasi percakapan. Ingatan yang relevan untuk giliran ini kadang sudah disertakan otomatis; panggil `recall_memories` hanya jika itu belum cukup.\n"
             "- Gunakan fungsi perangkat HANYA jika diminta secara eksplisit dan setelah mengonfirmasi semua detail.\n"
             "- **Gunakan fungsi `search_internet` ketika ditanya tentang peristiwa terkini, topik di luar data pelatihan Anda, atau fakta spesifik yang tidak Anda ketahui.**\n"
             "- **PENTING: Ketika Anda perlu menggunakan `search_internet`:**\n"
@@ -271,22 +295,66 @@ async def entrypoint(ctx: JobContext):
 
         logger.info(f"Job {job_id}: Creating LLM plugin instance...")
         llm_plugin_for_va = openai.LLM(model="gpt-4o-mini")
-        logger.info(f"Job {job_id}: Loading VAD model...")
-        vad_plugin = silero.VAD.load()
+        if USE_SHARED_VAD:
+            logger.info(f"Job {job_id}: Attaching to shared batched VAD engine...")
+            vad_plugin = SharedVAD()
+        else:
+            logger.info(f"Job {job_id}: Loading VAD model...")
+            vad_plugin = silero.VAD.load()
         logger.info(f"Job {job_id}: Creating STT plugin instance...")
-        stt_plugin = groq.STT(model="whisper-large-v3-turbo", language="id")
+        if USE_STT_PREPROCESS:
+            if USE_SHARED_VAD:
+                vad_model = SileroModel.shared()
+            else:
+                # Trim with the plugin's ONNX session instead of loading the model a second time.
+                vad_model = SileroModel(onnx_session=getattr(vad_plugin, "_onnx_session", None))
+            stt_plugin = PreprocessedGroqSTT(model="whisper-large-v3-turbo", language="id", audio_format=STT_UPLOAD_FORMAT,
+                                             vad_model=vad_model)
+        else:
+            stt_plugin = groq.STT(model="whisper-large-v3-turbo", language="id")
+        stt_plugin.on("metrics_collected", lambda m: logger.info(
+            "Job %s: STT %.0fms for %.2fs of audio (preprocess=%s)", job_id, m.duration * 1000, m.audio_duration, USE_STT_PREPROCESS))
+        stt_plugin = TranscriptHookSTT(stt_plugin)
+
+        if USE_MEMORY_PREFETCH and local_mem0_client and persistent_user_id:
+            memory_prefetcher = MemoryPrefetcher(
+                lambda query: search_mem0_with_timeout(local_mem0_client, persistent_user_id, query, limit=MEMORY_PREFETCH_LIMIT),
+                known_memories=retrieved_general_memory_texts,
+            )
+            stt_plugin.add_listener(memory_prefetcher.start)
+            logger.info(f"Job {job_id}: Per-turn memory prefetch enabled.")
+
+        if USE_ALARM_FAST_PATH:
+            alarm_fast_path = AlarmFastPath(assistant_fnc)
+            stt_plugin.add_listener(alarm_fast_path.on_transcript)
+            logger.info(f"Job {job_id}: Local alarm fast path enabled.")
+
+        async def _before_llm(agent: VoiceAssistant, chat_ctx: llm.ChatContext):
+            if alarm_fast_path and await alarm_fast_path.handle(agent, chat_ctx):
+                if memory_prefetcher:
+                    memory_prefetcher.cancel()
+                return False
+            if memory_prefetcher:
+                await memory_prefetcher.inject(chat_ctx)
         logger.info(f"Job {job_id}: Creating TTS plugin instance...")
-        tts_plugin = openai.TTS(voice="nova")
+        tts_plugin = PCMTTS(voice="nova") if USE_PCM_TTS else openai.TTS(voice="nova")
+        tts_plugin.on("metrics_collected", lambda m: logger.info(
+            "Job %s: TTS first byte %.0fms, %.2fs of audio (pcm=%s)", job_id, m.ttfb * 1000, m.audio_duration, USE_PCM_TTS))
+        assistant_tts = tts_plugin
+        if USE_ID_SEGMENTATION:
+            assistant_tts = tts.StreamAdapter(tts=tts_plugin, sentence_tokenizer=IndonesianSentenceTokenizer())
+            logger.info(f"Job {job_id}: Indonesian clause-level TTS segmentation enabled.")
 
         logger.info(f"Job {job_id}: Creating VoiceAssistant instance...")
         assistant = VoiceAssistant(
             vad=vad_plugin,
             stt=stt_plugin,
             llm=llm_plugin_for_va,
-            tts=tts_plugin,
+            tts=assistant_tts,
             chat_ctx=chat_history,
             fnc_ctx=assistant_fnc,
             allow_interruptions=True,
+            before_llm_cb=_before_llm,
         )
         logger.info(f"Job {job_id}: VoiceAssistant instance created.")
 
@@ -323,6 +391,12 @@ async def entrypoint(ctx: JobContext):
         if 'assistant_fnc' in locals() and assistant_fnc:
              logger.info(f"Job {job_id}: AssistantFnc cleanup (if any).")
 
+        if memory_prefetcher:
+            memory_prefetcher.cancel()
+            logger.info(f"Job {job_id}: Memory prefetch injected {memory_prefetcher.injected} times, missed budget {memory_prefetcher.skipped_late} times.")
+        if alarm_fast_path:
+            logger.info(f"Job {job_id}: Alarm fast path sent {alarm_fast_path.sent_directly} alarms directly ({alarm_fast_path.send_failed} failed), prefilled {alarm_fast_path.prefilled}.")
+
         try:
             if ctx.room and hasattr(ctx.room, 'off'):
                  ctx.room.off("data_received", _handle_data_sync)
@@ -371,11 +445,27 @@ async def entrypoint(ctx: JobContext):
 
         logger.info(f"Agent shutdown sequence for Job {job_id} completed in {time.time() - shutdown_start_time:.2f}s")
 
+def prewarm(proc: JobProcess):
+    # Runs after the cli/job process logging setup, which adds its own root handlers.
+    reclaim_root_logger()
+    if USE_SHARED_VAD:
+        BatchedVADEngine.shared()
+
+async def request_fnc(req: JobRequest):
+    # First hook that runs in the worker process after cli.run_app set up its logging.
+    reclaim_root_logger()
+    await req.accept()
+
 if __name__ == "__main__":
     logger.info("Starting LiveKit Agent worker...")
     worker_options = WorkerOptions(
         entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        request_fnc=request_fnc,
     )
+    if USE_SHARED_VAD:
+        worker_options.job_executor_type = JobExecutorType.THREAD
+        logger.info("Shared VAD enabled: jobs run as threads sharing one batched VAD engine.")
 
     use_ssl = os.getenv('USE_SSL', 'false').lower() == 'true'
     cert_path = 'certs/cert.pem'
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Iterable, List, Optional
+
+from livekit.agents import llm
+
+logger = logging.getLogger("memory-prefetch")
+
+MEMORY_PREFETCH_LIMIT = 3
+# Seconds from the final transcript to the LLM call that retrieval may take before we give up on injecting.
+MEMORY_PREFETCH_BUDGET = 1.0
+
+MemorySearch = Callable[[str], Awaitable[Optional[list]]]
+
+
+class MemoryPrefetcher:
+    """Fetches Mem0 memories for each user transcript while end-of-turn detection runs.
+
+    start() is called with every final transcript; a turn can arrive as several
+    final segments, so each call searches with all segments since the last
+    inject(). inject() is called from the agent's before_llm_cb and adds the
+    memories to that LLM call's ChatContext if they arrived within the budget.
+    Memories already in the system prompt are not repeated.
+    """
+
+    def __init__(self, search: MemorySearch, *, budget: float = MEMORY_PREFETCH_BUDGET,
+                 known_memories: Iterable[str] = ()) -> None:
+        self._search = search
+        self._budget = budget
+        self._known = {mem.strip() for mem in known_memories}
+        self._task: Optional[asyncio.Task] = None
+        self._segments: List[str] = []
+        self._started_at = 0.0
+        self.injected = 0
+        self.skipped_late = 0
+
+    def start(self, transcript: str) -> None:
+        transcript = transcript.strip()
+        if not transcript:
+            return
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._segments.append(transcript)
+        query = " ".join(self._segments)
+        self._started_at = time.perf_counter()
+        self._task = asyncio.create_task(self._search(query))
+        logger.debug("Started memory prefetch for turn (%d segments): '%.80s'", len(self._segments), query)
+
+    async def inject(self, chat_ctx: llm.ChatContext) -> None:
+        task, self._task = self._task, None
+        self._segments = []
+        if task is None:
+            return
+        if not task.done():
+            remaining = self._started_at + self._budget - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                await asyncio.wait_for(task, timeout=remaining)
+            except asyncio.TimeoutError:
+                task.cancel()
+                self.skipped_late += 1
+                logger.info("Memory prefetch missed its %.2fs budget, calling LLM without it.", self._budget)
+                return
+        try:
+            results = task.result()
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            logger.warning("Memory prefetch failed: %s", e)
+            return
+
+        memories = self._new_memories(results)
+        if not memories:
+            return
+        message = llm.ChatMessage.create(
+            role="system",
+            text="Ingatan relevan tentang pengguna (diambil otomatis untuk giliran ini):\n"
+                 + "\n".join(f"- {mem}" for mem in memories),
+        )
+        insert_at = len(chat_ctx.messages)
+        if chat_ctx.messages and chat_ctx.messages[-1].role == "user":
+            insert_at -= 1
+        chat_ctx.messages.insert(insert_at, message)
+        self.injected += 1
+        logger.info("Injected %d prefetched memories %.0fms after transcript.",
+                    len(memories), (time.perf_counter() - self._started_at) * 1000)
+
+    def _new_memories(self, results: Optional[list]) -> List[str]:
+        if not isinstance(results, list):
+            return []
+        memories = []
+        for item in results:
+            text = item.get('memory', '').strip() if isinstance(item, dict) else ''
+            if text and text not in self._known and text not in memories:
+                memories.append(text)
+        return memories
+
+    def cancel(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self._segments = []
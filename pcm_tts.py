@@ -0,0 +1,90 @@
+import logging
+import time
+from typing import Optional
+
+import httpx
+import openai
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectionError,
+    APIConnectOptions,
+    APIStatusError,
+    APITimeoutError,
+    tts,
+    utils,
+)
+
+logger = logging.getLogger("pcm-tts")
+
+# OpenAI's "pcm" response format: raw 24 kHz, 16-bit signed little-endian, mono.
+OPENAI_PCM_SAMPLE_RATE = 24000
+OPENAI_PCM_CHANNELS = 1
+# 20ms frames so playback can start on the first few hundred bytes.
+PCM_FRAME_SAMPLES = OPENAI_PCM_SAMPLE_RATE // 50
+
+
+class PCMTTS(tts.TTS):
+    """OpenAI TTS that requests raw PCM and streams it into frames as bytes arrive.
+
+    The default plugin asks for a compressed format and decodes it on the
+    agent's CPU; here the only work per chunk is slicing the byte stream into
+    AudioFrames at the rate the agent publishes, so there is no decoder.
+    """
+
+    def __init__(self, *, model: str = "tts-1", voice: str = "nova", speed: float = 1.0,
+                 client: Optional[openai.AsyncClient] = None) -> None:
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=OPENAI_PCM_SAMPLE_RATE,
+            num_channels=OPENAI_PCM_CHANNELS,
+        )
+        self._model = model
+        self._voice = voice
+        self._speed = speed
+        self._client = client or openai.AsyncClient(max_retries=0)
+
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> "PCMChunkedStream":
+        return PCMChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class PCMChunkedStream(tts.ChunkedStream):
+    def __init__(self, *, tts: PCMTTS, input_text: str, conn_options: APIConnectOptions) -> None:
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._pcm_tts = tts
+
+    async def _run(self) -> None:
+        request_id = utils.shortuuid()
+        byte_stream = utils.audio.AudioByteStream(
+            sample_rate=OPENAI_PCM_SAMPLE_RATE,
+            num_channels=OPENAI_PCM_CHANNELS,
+            samples_per_channel=PCM_FRAME_SAMPLES,
+        )
+        start_time = time.perf_counter()
+        first_frame_at: Optional[float] = None
+        total_bytes = 0
+        try:
+            async with self._pcm_tts._client.audio.speech.with_streaming_response.create(
+                input=self._input_text,
+                model=self._pcm_tts._model,
+                voice=self._pcm_tts._voice,
+                response_format="pcm",
+                speed=self._pcm_tts._speed,
+                timeout=httpx.Timeout(30, connect=self._conn_options.timeout),
+            ) as response:
+                async for data in response.iter_bytes():
+                    total_bytes += len(data)
+                    for frame in byte_stream.write(data):
+                        if first_frame_at is None:
+                            first_frame_at = time.perf_counter() - start_time
+                        self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, frame=frame))
+                for frame in byte_stream.flush():
+                    self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, frame=frame))
+        except openai.APITimeoutError:
+            raise APITimeoutError()
+        except openai.APIStatusError as e:
+            raise APIStatusError(e.message, status_code=e.status_code, request_id=e.request_id, body=e.body)
+        except Exception as e:
+            raise APIConnectionError() from e
+
+        logger.debug("PCM TTS: first frame %.0fms, %.2fs of audio for %d chars.",
+                     (first_frame_at or 0.0) * 1000, total_bytes / (2 * OPENAI_PCM_SAMPLE_RATE), len(self._input_text))
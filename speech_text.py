@@ -0,0 +1,226 @@
+import logging
+import re
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from livekit.agents import tokenize, utils
+
+logger = logging.getLogger("speech-text")
+
+_CITATION_RE = re.compile(r'\s?\[\d+(?:\s*[,-]\s*\d+)*\]')
+_MD_LINK_RE = re.compile(r'\[([^\]]+)\]\((?:[^)]+)\)')
+_URL_RE = re.compile(r'https?://\S+')
+_MD_HEADING_RE = re.compile(r'^\s{0,3}#{1,6}\s*', re.MULTILINE)
+_MD_BULLET_RE = re.compile(r'^\s*[-*+]\s+', re.MULTILINE)
+_MD_EMPHASIS_RE = re.compile(r'(\*\*|__|\*|`+)')
+_MD_TABLE_RE = re.compile(r'\|')
+_WHITESPACE_RE = re.compile(r'[ \t]+')
+# A break only counts once the whitespace after it has arrived, so streamed text is never split early.
+_BREAK_RE = re.compile(r'[.!?…]+["\'”’)\]]*(?=\s)|[,;:](?=\s)|\s[–—](?=\s)|\n+')
+# A complete following word ("S.Pd. ") that is an academic degree: letters with an inner dot.
+_NEXT_WORD_RE = re.compile(r'\s*(\S+)\s')
+_DEGREE_RE = re.compile(r'[A-Za-z]+\.[A-Za-z.]+')
+
+# Abbreviations that never end a sentence (titles, addresses, units, degrees).
+ABBREVIATIONS_NO_BREAK = {
+    "bpk", "bp", "bu", "sdr", "sdri", "yth", "dr", "drs", "dra", "ir", "prof", "h", "hj", "kh", "ust", "ustz",
+    "jl", "jln", "gg", "no", "rt", "rw", "kec", "kel", "kab", "prov", "st", "pt", "cv", "tbk", "rp", "tgl",
+    "hlm", "hal", "kg", "gr", "km", "cm", "mm", "ml", "sbg", "spt", "dg", "dgn", "yg", "utk", "mis", "a.n",
+    "u.p", "s.h", "s.e", "s.t", "s.pd", "s.kom", "s.psi", "s.ked", "m.si", "m.pd", "m.m", "m.kom", "ph.d",
+    "mr", "mrs", "ms", "vs", "e.g", "i.e",
+}
+# Abbreviations that may end a sentence; they only do when the next word is capitalised.
+ABBREVIATIONS_TERMINAL = {"dll", "dsb", "dst", "dkk", "tsb", "etc"}
+
+TTS_MIN_FIRST_CHUNK_LEN = 15
+TTS_MIN_SENTENCE_LEN = 25
+TTS_MAX_SENTENCE_LEN = 120
+
+
+def clean_text_for_speech(text: str) -> str:
+    """Strip citation markers, markdown and URLs so the text reads naturally in TTS."""
+    text = _CITATION_RE.sub('', text)
+    text = _MD_LINK_RE.sub(r'\1', text)
+    text = _URL_RE.sub('', text)
+    text = _MD_HEADING_RE.sub('', text)
+    text = _MD_BULLET_RE.sub('', text)
+    text = _MD_EMPHASIS_RE.sub('', text)
+    text = _MD_TABLE_RE.sub(' ', text)
+    return _WHITESPACE_RE.sub(' ', text)
+
+
+def _is_abbreviation(text: str, dot_start: int, break_end: int) -> bool:
+    line_start = text.rfind("\n", 0, dot_start) + 1
+    before = text[line_start:dot_start]
+    words = before.split()
+    if not words:
+        return False
+    word = words[-1].lower().lstrip('(["\'“‘')
+    if word in ABBREVIATIONS_NO_BREAK or (len(word) == 1 and word.isalpha()):
+        return True
+    if word.isdigit() and len(words) == 1:
+        # "1. Pertama ..." list numbering, not the end of a sentence.
+        return True
+    if word in ABBREVIATIONS_TERMINAL:
+        following = text[break_end:].lstrip()[:1]
+        return not (following and following.isupper())
+    return False
+
+
+def iter_breaks(text: str) -> Iterator[Tuple[int, bool]]:
+    """Yields (end offset, is_sentence_end) for every complete sentence or clause break in text."""
+    for match in _BREAK_RE.finditer(text):
+        token = match.group(0)
+        if token[0] == "\n":
+            yield match.end(), True
+        elif token[0] in ".!?…":
+            if token.rstrip('"\'”’)]') == "." and _is_abbreviation(text, match.start(), match.end()):
+                continue
+            yield match.end(), True
+        else:
+            if token[0] == ",":
+                # "Dr. Andi, S.Pd." is one name: wait for the next word and never split before a degree.
+                following = _NEXT_WORD_RE.match(text, match.end())
+                if following is None or _DEGREE_RE.fullmatch(following.group(1)):
+                    continue
+            yield match.end(), False
+
+
+def next_chunk_end(text: str, first: bool, min_first_len: int = TTS_MIN_FIRST_CHUNK_LEN,
+                   min_sentence_len: int = TTS_MIN_SENTENCE_LEN,
+                   max_sentence_len: int = TTS_MAX_SENTENCE_LEN) -> Optional[int]:
+    """Where the next TTS chunk should end, or None to wait for more text.
+
+    The first chunk of a reply flushes at the first clause or sentence break
+    once it is min_first_len long; later chunks wait for a full sentence of
+    min_sentence_len, falling back to a clause break when the text runs past
+    max_sentence_len without one.
+    """
+    clause_end = None
+    for end, is_sentence in iter_breaks(text):
+        length = len(text[:end].strip())
+        if first:
+            if length >= min_first_len:
+                return end
+            continue
+        if length < min_sentence_len:
+            continue
+        if is_sentence:
+            return end
+        if clause_end is None:
+            clause_end = end
+    if clause_end is not None and len(text) >= max_sentence_len:
+        return clause_end
+    return None
+
+
+class SpeechSegmenter:
+    """Turns streamed text deltas into cleaned, speakable sentences.
+
+    Only text up to the last sentence break is emitted, so a citation marker or
+    markdown token split across two deltas is cleaned once it is complete.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def push(self, delta: str) -> List[str]:
+        self._buffer = _CITATION_RE.sub('', self._buffer + delta)
+        parts = []
+        start = 0
+        for end, is_sentence in iter_breaks(self._buffer):
+            if is_sentence:
+                parts.append(self._buffer[start:end])
+                start = end
+        self._buffer = self._buffer[start:]
+        return self._clean_parts(parts)
+
+    def flush(self) -> List[str]:
+        parts, self._buffer = [self._buffer], ""
+        return self._clean_parts(parts)
+
+    @staticmethod
+    def _clean_parts(parts: List[str]) -> List[str]:
+        sentences = []
+        for part in parts:
+            cleaned = clean_text_for_speech(part).strip()
+            if cleaned and any(ch.isalnum() for ch in cleaned):
+                sentences.append(cleaned)
+        return sentences
+
+
+class IndonesianSentenceTokenizer(tokenize.SentenceTokenizer):
+    """Clause-level tokenizer for streaming Indonesian LLM replies into TTS.
+
+    Knows common Indonesian abbreviations ("dll.", "Bpk.", "S.Pd.") and sends
+    the first speakable clause as early as possible; see next_chunk_end().
+    """
+
+    def __init__(self, *, min_first_len: int = TTS_MIN_FIRST_CHUNK_LEN,
+                 min_sentence_len: int = TTS_MIN_SENTENCE_LEN,
+                 max_sentence_len: int = TTS_MAX_SENTENCE_LEN) -> None:
+        self._min_first_len = min_first_len
+        self._min_sentence_len = min_sentence_len
+        self._max_sentence_len = max_sentence_len
+
+    def next_chunk_end(self, text: str, first: bool) -> Optional[int]:
+        return next_chunk_end(text, first, self._min_first_len, self._min_sentence_len, self._max_sentence_len)
+
+    def tokenize(self, text: str, *, language: Optional[str] = None) -> List[str]:
+        chunks = []
+        first = True
+        while (end := self.next_chunk_end(text, first)) is not None:
+            if text[:end].strip():
+                chunks.append(text[:end].strip())
+            text = text[end:]
+            first = False
+        if text.strip():
+            chunks.append(text.strip())
+        return chunks
+
+    def stream(self, *, language: Optional[str] = None) -> "IndonesianSentenceStream":
+        return IndonesianSentenceStream(self)
+
+
+class IndonesianSentenceStream(tokenize.SentenceStream):
+    def __init__(self, tokenizer: IndonesianSentenceTokenizer) -> None:
+        super().__init__()
+        self._tokenizer = tokenizer
+        self._buffer = ""
+        self._segment_id = utils.shortuuid()
+        self._first = True
+        self._first_text_at: Optional[float] = None
+
+    def push_text(self, text: str) -> None:
+        if self._event_ch.closed:
+            raise RuntimeError("IndonesianSentenceStream is closed")
+        if self._first_text_at is None:
+            self._first_text_at = time.perf_counter()
+        self._buffer += text
+        while (end := self._tokenizer.next_chunk_end(self._buffer, self._first)) is not None:
+            chunk, self._buffer = self._buffer[:end], self._buffer[end:]
+            self._emit(chunk)
+
+    def _emit(self, chunk: str) -> None:
+        chunk = chunk.strip()
+        if not chunk:
+            return
+        if self._first:
+            self._first = False
+            logger.info("First TTS chunk %.0fms after first LLM token (%d chars).",
+                        (time.perf_counter() - (self._first_text_at or time.perf_counter())) * 1000, len(chunk))
+        self._event_ch.send_nowait(tokenize.TokenData(segment_id=self._segment_id, token=chunk))
+
+    def flush(self) -> None:
+        self._emit(self._buffer)
+        self._buffer = ""
+        self._segment_id = utils.shortuuid()
+        self._first = True
+        self._first_text_at = None
+
+    def end_input(self) -> None:
+        self.flush()
+        self._event_ch.close()
+
+    async def aclose(self) -> None:
+        self._event_ch.close()
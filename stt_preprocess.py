@@ -0,0 +1,172 @@
+import asyncio
+import io
+import logging
+import os
+import time
+import wave
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import httpx
+import numpy as np
+import openai
+from livekit import rtc
+from livekit.agents import APIConnectionError, APIConnectOptions, APIStatusError, APITimeoutError, stt, utils
+
+from vad_engine import SileroModel, VAD_SAMPLE_RATE, VAD_WINDOW_SAMPLES
+
+logger = logging.getLogger("stt-preprocess")
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+STT_TRIM_THRESHOLD = 0.5
+STT_TRIM_PADDING = 0.2
+STT_UPLOAD_FORMATS = ("flac", "ogg", "wav")
+
+
+@dataclass
+class PreparedUpload:
+    payload: bytes
+    filename: str
+    mime_type: str
+    raw_bytes: int
+    input_duration: float
+    trimmed_duration: float
+
+
+def _to_mono_16k(frame: rtc.AudioFrame) -> np.ndarray:
+    samples = np.frombuffer(frame.data, dtype=np.int16)
+    if frame.num_channels > 1:
+        samples = samples.reshape(-1, frame.num_channels).mean(axis=1).astype(np.int16)
+    if frame.sample_rate == VAD_SAMPLE_RATE:
+        return samples
+    resampler = rtc.AudioResampler(input_rate=frame.sample_rate, output_rate=VAD_SAMPLE_RATE,
+                                   quality=rtc.AudioResamplerQuality.MEDIUM)
+    mono = rtc.AudioFrame(data=samples.tobytes(), sample_rate=frame.sample_rate,
+                          num_channels=1, samples_per_channel=len(samples))
+    frames = resampler.push(mono) + resampler.flush()
+    if not frames:
+        return np.empty(0, dtype=np.int16)
+    return np.concatenate([np.frombuffer(f.data, dtype=np.int16) for f in frames])
+
+
+def trim_silence(samples: np.ndarray, probabilities: np.ndarray, threshold: float = STT_TRIM_THRESHOLD,
+                 padding: float = STT_TRIM_PADDING) -> np.ndarray:
+    """Cuts leading/trailing windows whose VAD probability stays below threshold, keeping some padding."""
+    speech = np.flatnonzero(probabilities >= threshold)
+    if not len(speech):
+        return samples[:0]
+    pad = int(padding * VAD_SAMPLE_RATE)
+    start = max(0, speech[0] * VAD_WINDOW_SAMPLES - pad)
+    end = min(len(samples), (speech[-1] + 1) * VAD_WINDOW_SAMPLES + pad)
+    return samples[start:end]
+
+
+def encode_audio(samples: np.ndarray, audio_format: str) -> Tuple[bytes, str, str]:
+    """Encodes 16 kHz mono int16 samples; returns (payload, filename, mime type)."""
+    if audio_format in ("flac", "ogg"):
+        try:
+            import av
+        except ImportError:
+            logger.warning("PyAV not installed, uploading WAV instead of %s.", audio_format)
+        else:
+            codec = "flac" if audio_format == "flac" else "libopus"
+            out = io.BytesIO()
+            with av.open(out, mode="w", format=audio_format) as container:
+                stream = container.add_stream(codec, rate=VAD_SAMPLE_RATE, layout="mono")
+                frame = av.AudioFrame.from_ndarray(samples.reshape(1, -1), format="s16", layout="mono")
+                frame.sample_rate = VAD_SAMPLE_RATE
+                for packet in stream.encode(frame):
+                    container.mux(packet)
+                for packet in stream.encode(None):
+                    container.mux(packet)
+            mime_type = "audio/flac" if audio_format == "flac" else "audio/ogg"
+            return out.getvalue(), f"audio.{audio_format}", mime_type
+
+    out = io.BytesIO()
+    with wave.open(out, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(VAD_SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+    return out.getvalue(), "audio.wav", "audio/wav"
+
+
+def prepare_upload(buffer: utils.AudioBuffer, model: SileroModel, audio_format: str) -> Optional[PreparedUpload]:
+    """Trim, downmix/resample and encode one VAD segment. Returns None if it holds no speech.
+
+    The segment is scored again here rather than reusing the VAD stream's
+    probabilities: VoicePipelineAgent wraps a non-streaming STT in
+    stt.StreamAdapter, which runs its own VAD stream and hands recognize()
+    only the merged END_OF_SPEECH frames, and the per-job silero plugin keeps
+    its probabilities private. The pass runs once per utterance off the event
+    loop, not per 32ms window in real time, and is what lets empty segments
+    skip the upload entirely.
+    """
+    frame = rtc.combine_audio_frames(buffer)
+    raw_bytes = len(frame.data) * 2 + 44
+    input_duration = frame.samples_per_channel / frame.sample_rate
+    samples = _to_mono_16k(frame)
+    probabilities = model.speech_probabilities(samples.astype(np.float32) / 32768.0)
+    trimmed = trim_silence(samples, probabilities)
+    if not len(trimmed):
+        return None
+    payload, filename, mime_type = encode_audio(trimmed, audio_format)
+    return PreparedUpload(payload=payload, filename=filename, mime_type=mime_type, raw_bytes=raw_bytes,
+                          input_duration=input_duration, trimmed_duration=len(trimmed) / VAD_SAMPLE_RATE)
+
+
+class PreprocessedGroqSTT(stt.STT):
+    """Groq Whisper STT that trims silence and uploads compact 16 kHz mono audio.
+
+    Same request as groq.STT, but the VAD segment is trimmed with the shared
+    Silero model, downmixed/resampled to 16 kHz and encoded (FLAC by default)
+    before upload. Segments with no speech are never uploaded.
+    """
+
+    def __init__(self, *, model: str = "whisper-large-v3-turbo", language: str = "id",
+                 audio_format: str = "flac", vad_model: Optional[SileroModel] = None,
+                 api_key: Optional[str] = None, base_url: str = GROQ_BASE_URL) -> None:
+        super().__init__(capabilities=stt.STTCapabilities(streaming=False, interim_results=False))
+        if audio_format not in STT_UPLOAD_FORMATS:
+            raise ValueError(f"audio_format must be one of {STT_UPLOAD_FORMATS}, got '{audio_format}'")
+        self._model = model
+        self._language = language
+        self._audio_format = audio_format
+        self._vad_model = vad_model or SileroModel.shared()
+        # Retries are driven by conn_options in the agents framework, as in the stock plugin.
+        self._client = openai.AsyncClient(api_key=api_key or os.getenv("GROQ_API_KEY"), base_url=base_url, max_retries=0)
+
+    async def _recognize_impl(self, buffer: utils.AudioBuffer, *, language: Optional[str] = None,
+                              conn_options: APIConnectOptions) -> stt.SpeechEvent:
+        language = language or self._language
+        prep_start = time.perf_counter()
+        upload = await asyncio.to_thread(prepare_upload, buffer, self._vad_model, self._audio_format)
+        prep_time = time.perf_counter() - prep_start
+        if upload is None:
+            logger.info("STT segment had no speech after trimming, skipped upload (prep %.0fms).", prep_time * 1000)
+            return stt.SpeechEvent(type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+                                   alternatives=[stt.SpeechData(text="", language=language)])
+
+        request_start = time.perf_counter()
+        try:
+            resp = await self._client.audio.transcriptions.create(
+                file=(upload.filename, upload.payload, upload.mime_type),
+                model=self._model,
+                language=language,
+                response_format="json",
+                timeout=httpx.Timeout(30, connect=conn_options.timeout),
+            )
+        except openai.APITimeoutError:
+            raise APITimeoutError()
+        except openai.APIStatusError as e:
+            raise APIStatusError(e.message, status_code=e.status_code, request_id=e.request_id, body=e.body)
+        except Exception as e:
+            raise APIConnectionError() from e
+        logger.info(
+            "STT upload %d bytes (raw %d, %.0f%%), audio %.2fs -> %.2fs, prep %.0fms, transcription %.0fms.",
+            len(upload.payload), upload.raw_bytes, 100 * len(upload.payload) / max(upload.raw_bytes, 1),
+            upload.input_duration, upload.trimmed_duration, prep_time * 1000,
+            (time.perf_counter() - request_start) * 1000,
+        )
+        return stt.SpeechEvent(type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+                               alternatives=[stt.SpeechData(text=resp.text or "", language=language)])
@@ -0,0 +1,178 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from livekit.agents import llm
+
+from alarm_intent import AlarmFastPath, parse_alarm_command
+
+# Monday 19 October 2026, 08:00.
+NOW = datetime(2026, 10, 19, 8, 0)
+
+
+def parse(text):
+    intent = parse_alarm_command(text, now=NOW)
+    assert intent is not None
+    return intent
+
+
+@pytest.mark.parametrize("text", ["apa kabar hari ini?", "hapus alarm jam 7 pagi", "ingat minggu lalu kita ke pantai"])
+def test_not_an_alarm_command(text):
+    assert parse_alarm_command(text, now=NOW) is None
+
+
+@pytest.mark.parametrize("text, date, hour, minute", [
+    ("ingatkan saya 30 menit lagi untuk angkat jemuran", "2026-10-19", 8, 30),
+    ("ingatkan saya sejam lagi untuk minum obat", "2026-10-19", 9, 0),
+    ("ingatkan saya jam 9 pagi 3 hari lagi untuk telepon ibu", "2026-10-22", 9, 0),
+    ("ingatkan aku jam 8 malam seminggu lagi untuk bayar tagihan", "2026-10-26", 20, 0),
+    ("Ingatkan saya jam 9 pagi dua minggu lagi untuk kontrol ke dokter", "2026-11-02", 9, 0),
+])
+def test_relative_dates(text, date, hour, minute):
+    intent = parse(text)
+    assert (intent.date, intent.hour, intent.minute) == (date, hour, minute)
+    assert intent.complete
+
+
+@pytest.mark.parametrize("text, date", [
+    ("pasang alarm jam 6 pagi hari minggu untuk lari", "2026-10-25"),
+    ("pasang alarm jam 6 pagi hari jumat untuk lari", "2026-10-23"),
+    ("pasang alarm jam 6 pagi rabu depan untuk lari", "2026-10-28"),
+    ("pasang alarm jam 7 pagi hari minggu depan untuk lari", "2026-11-01"),
+    ("bangunkan saya besok jam 5 pagi", "2026-10-20"),
+    ("ingatkan saya tanggal 21 november jam 10 pagi untuk ke dokter gigi", "2026-11-21"),
+])
+def test_calendar_dates(text, date):
+    intent = parse(text)
+    assert intent.date == date
+    assert intent.complete
+
+
+@pytest.mark.parametrize("text", [
+    "pasang alarm jam 6 pagi minggu depan untuk lari",
+    "pasang alarm jam 6 pagi minggu ini untuk lari",
+])
+def test_week_without_day_is_ambiguous(text):
+    intent = parse(text)
+    assert intent.date is None
+    assert intent.ambiguities
+    assert not intent.complete
+
+
+def test_same_weekday_as_today_is_ambiguous():
+    intent = parse("pasang alarm jam 9 pagi hari senin untuk rapat")
+    assert intent.ambiguities
+    assert not intent.complete
+
+
+@pytest.mark.parametrize("text, hour, minute", [
+    ("bangunkan saya besok jam setengah enam pagi", 5, 30),
+    ("ingatkan saya besok jam 3 sore untuk rapat", 15, 0),
+    ("ingatkan saya besok jam 1 siang untuk rapat", 13, 0),
+    ("ingatkan saya besok jam 8 malam untuk rapat", 20, 0),
+    ("ingatkan saya besok jam 7 lewat seperempat pagi untuk rapat", 7, 15),
+    ("ingatkan saya besok jam 7 kurang seperempat malam untuk rapat", 18, 45),
+    ("ingatkan saya besok pukul 19.30 untuk rapat", 19, 30),
+    ("ingatkan saya untuk minum obat besok jam 8 malam", 20, 0),
+])
+def test_times_with_periods(text, hour, minute):
+    intent = parse(text)
+    assert (intent.hour, intent.minute) == (hour, minute)
+    assert not intent.ambiguities
+
+
+def test_time_without_period_is_ambiguous():
+    intent = parse("pasang alarm jam 7 untuk sarapan")
+    assert (intent.hour, intent.minute) == (7, 0)
+    assert intent.ambiguities
+    assert not intent.complete
+
+
+def test_time_already_passed_is_ambiguous():
+    intent = parse("ingatkan saya hari ini jam 7 pagi untuk sarapan")
+    assert intent.ambiguities
+
+
+@pytest.mark.parametrize("text, message", [
+    ("pasang alarm jam 6 pagi hari minggu untuk lari di taman", "Lari di taman"),
+    ("ingatkan saya jam 3 sore untuk rapat pada hari jumat dengan klien", "Rapat dengan klien"),
+    ("ingatkan saya besok jam 12 untuk makan siang ya", "Makan siang"),
+    ("ingatkan aku jam 8 malam seminggu lagi untuk bayar tagihan ya", "Bayar tagihan"),
+    ("pasang alarm besok jam 6 pagi dengan pesan berangkat ke bandara", "Berangkat ke bandara"),
+    ("ingatkan saya besok jam 9 pagi untuk telepon ibu saya", "Telepon ibu saya"),
+])
+def test_label_extraction(text, message):
+    assert parse(text).message == message
+
+
+def test_wake_up_without_label():
+    assert parse("bangunkan saya besok jam 5 pagi").message == "Bangun"
+
+
+@pytest.mark.parametrize("text", [
+    "ingatkan saya jam 7 pagi tiap hari untuk olahraga",
+    "ingatkan saya setiap senin jam 7 pagi untuk rapat",
+    "ingatkan saya besok jam 7 pagi dan jam 8 malam untuk minum obat",
+    "ingatkan saya besok dan lusa jam 7 pagi untuk minum obat",
+    "ingatkan saya 30 menit lagi jam 9 pagi untuk rapat",
+])
+def test_requests_one_alarm_cannot_represent_are_not_complete(text):
+    intent = parse(text)
+    assert intent.ambiguities
+    assert not intent.complete
+
+
+class FakeFnc:
+    def __init__(self, sent):
+        self.sent = sent
+        self.calls = []
+
+    async def send_alarm(self, hour, minute, date, message):
+        self.calls.append((hour, minute, date, message))
+        return self.sent, "ok" if self.sent else "Maaf, gagal."
+
+
+class FakeAgent:
+    def __init__(self):
+        self.chat_ctx = llm.ChatContext()
+        self.said = []
+
+    async def say(self, text, allow_interruptions=True):
+        self.said.append(text)
+
+
+def run_handle(fast_path, text):
+    chat_ctx = llm.ChatContext().append(role="user", text=text)
+
+    async def handle():
+        handled = await fast_path.handle(FakeAgent(), chat_ctx)
+        await asyncio.sleep(0)
+        return handled
+
+    return asyncio.run(handle()), chat_ctx
+
+
+def test_memory_question_is_left_alone():
+    fast_path = AlarmFastPath(FakeFnc(sent=True))
+    handled, chat_ctx = run_handle(fast_path, "ingatkan saya apa yang kita bahas kemarin")
+    assert not handled
+    assert len(chat_ctx.messages) == 1
+    assert fast_path.prefilled == 0
+
+
+def test_complete_alarm_is_sent_directly():
+    fnc = FakeFnc(sent=True)
+    fast_path = AlarmFastPath(fnc)
+    handled, _ = run_handle(fast_path, "ingatkan saya besok jam 3 sore untuk rapat")
+    assert handled
+    assert fast_path.sent_directly == 1
+    assert fnc.calls and fnc.calls[0][:2] == (15, 0)
+
+
+def test_failed_send_goes_to_llm():
+    fast_path = AlarmFastPath(FakeFnc(sent=False))
+    handled, chat_ctx = run_handle(fast_path, "ingatkan saya besok jam 3 sore untuk rapat")
+    assert not handled
+    assert fast_path.sent_directly == 0
+    assert fast_path.send_failed == 1
+    assert chat_ctx.messages[0].role == "system"
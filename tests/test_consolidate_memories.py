@@ -0,0 +1,117 @@
+from datetime import datetime, timezone
+
+from consolidate_memories import PROFILE_TYPE, plan_consolidation
+
+NOW = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+
+def memory(memory_id, text, category="important_dates", updated_at="2026-10-01T00:00:00Z", **metadata):
+    entry = {"id": memory_id, "memory": text, "metadata": {"category": category, **metadata}}
+    if updated_at:
+        entry["updated_at"] = updated_at
+    return entry
+
+
+def test_different_dates_are_not_merged():
+    plan = plan_consolidation("u1", [
+        memory("a", "Has a dentist appointment on 2026-10-21", updated_at="2026-10-10T00:00:00Z"),
+        memory("b", "Has a dentist appointment on 2026-11-21", updated_at="2026-10-12T00:00:00Z"),
+    ], now=NOW)
+    assert plan.deletes == []
+    assert plan.merged == 0
+    assert sorted(plan.absorbed) == ["a", "b"]
+
+
+def test_different_numbers_are_not_merged():
+    plan = plan_consolidation("u1", [
+        memory("a", "Has two children aged 5 and 7", category="personal_details"),
+        memory("b", "Has two children aged 6 and 8", category="personal_details"),
+    ], now=NOW)
+    assert plan.deletes == []
+
+
+def test_near_duplicates_merge_into_newest():
+    plan = plan_consolidation("u1", [
+        memory("old", "Likes nasi goreng with extra chili", category="preferences", updated_at="2026-09-01T00:00:00Z"),
+        memory("new", "Likes nasi goreng with extra chilli", category="preferences", updated_at="2026-10-01T00:00:00Z"),
+    ], now=NOW)
+    assert plan.deletes == ["old"]
+    assert plan.absorbed == ["new"]
+
+
+def test_same_numbers_still_merge():
+    plan = plan_consolidation("u1", [
+        memory("old", "Dentist appointment on 2026-10-21", updated_at="2026-10-01T00:00:00Z"),
+        memory("new", "Has a dentist appointment on 2026-10-21", updated_at="2026-10-02T00:00:00Z"),
+    ], now=NOW)
+    assert plan.deletes == ["old"]
+
+
+def test_ttl_expires_old_memories():
+    plan = plan_consolidation("u1", [
+        memory("stale", "Worried about the exam", category="concerns", updated_at="2026-01-01T00:00:00Z"),
+    ], now=NOW)
+    assert plan.deletes == ["stale"]
+    assert plan.expired == 1
+
+
+def test_memory_without_timestamp_is_kept():
+    plan = plan_consolidation("u1", [
+        memory("undated", "Worried about the exam", category="concerns", updated_at=None),
+    ], now=NOW)
+    assert plan.deletes == []
+    assert plan.expired == 0
+    assert plan.absorbed == ["undated"]
+
+
+def test_single_value_type_keeps_latest():
+    plan = plan_consolidation("u1", [
+        memory("old", "User's name is Budi", category="personal_details", type="name", updated_at="2026-09-01T00:00:00Z"),
+        memory("new", "User's name is Bambang", category="personal_details", type="name"),
+    ], now=NOW)
+    assert plan.deletes == ["old"]
+
+
+def test_profile_replaces_previous_profile_and_keeps_its_facts():
+    previous = {
+        "id": "profile", "memory": "Canonical user profile. preferences: Likes kopi tubruk",
+        "metadata": {"category": "profile", "type": PROFILE_TYPE, "facts": [
+            {"category": "preferences", "type": None, "text": "Likes kopi tubruk", "ts": "2026-08-01T00:00:00+00:00"},
+        ]},
+    }
+    plan = plan_consolidation("u1", [
+        previous,
+        memory("new", "Enjoys reading novels", category="preferences"),
+    ], now=NOW)
+    assert plan.profile_ids == ["profile"]
+    assert plan.absorbed == ["new"]
+    assert [fact["text"] for fact in plan.profile_facts] == ["Enjoys reading novels", "Likes kopi tubruk"]
+    assert "Likes kopi tubruk" in plan.profile_text
+
+
+def test_absorbed_facts_are_not_kept_separately():
+    memories = [memory(str(i), f"Fact number {i} about hobbies", category="hobbies",
+                       updated_at=f"2026-10-0{i}T00:00:00Z") for i in range(1, 6)]
+    plan = plan_consolidation("u1", memories, now=NOW)
+    # Only the newest PROFILE_MAX_ITEMS_PER_CATEGORY go into the profile; the rest stay as memories.
+    assert plan.absorbed == ["5", "4", "3"]
+    assert plan.deletes == []
+
+
+def test_profile_facts_that_no_longer_fit_are_restored():
+    previous = {
+        "id": "profile", "memory": "Canonical user profile.",
+        "metadata": {"category": "profile", "type": PROFILE_TYPE, "facts": [
+            {"category": "preferences", "type": None, "text": text, "ts": f"2026-08-0{day}T00:00:00+00:00"}
+            for day, text in ((3, "Likes jazz music"), (2, "Prefers tea over coffee"), (1, "Likes kopi tubruk"))
+        ]},
+    }
+    plan = plan_consolidation("u1", [
+        previous,
+        memory("new", "Enjoys reading novels", category="preferences"),
+    ], now=NOW)
+    assert plan.absorbed == ["new"]
+    assert [fact["text"] for fact in plan.profile_facts] == [
+        "Enjoys reading novels", "Likes jazz music", "Prefers tea over coffee"]
+    assert plan.restores == [{"category": "preferences", "type": None, "text": "Likes kopi tubruk"}]
+    assert plan.profile_ids == ["profile"]
@@ -0,0 +1,100 @@
+import pytest
+
+from speech_text import IndonesianSentenceTokenizer, SpeechSegmenter, clean_text_for_speech, next_chunk_end
+
+
+def tokenize(text):
+    return IndonesianSentenceTokenizer().tokenize(text)
+
+
+def stream_chunks(text, step=3):
+    """Replays text in small deltas through next_chunk_end(), as IndonesianSentenceStream does."""
+    chunks, buffer, first = [], "", True
+    for i in range(0, len(text), step):
+        buffer += text[i:i + step]
+        while (end := next_chunk_end(buffer, first)) is not None:
+            chunks.append(buffer[:end].strip())
+            buffer, first = buffer[end:], False
+    if buffer.strip():
+        chunks.append(buffer.strip())
+    return chunks
+
+
+@pytest.mark.parametrize("text, chunks", [
+    ("Baik, Bpk. Budi, alarmnya sudah saya pasang untuk jam tujuh pagi.",
+     ["Baik, Bpk. Budi,", "alarmnya sudah saya pasang untuk jam tujuh pagi."]),
+    ("Halo, Dr. Andi, S.Pd. akan mengajar besok pagi di kelas tiga. Terima kasih.",
+     ["Halo, Dr. Andi, S.Pd. akan mengajar besok pagi di kelas tiga.", "Terima kasih."]),
+    ("Saya sudah siapkan semuanya dll. Besok kita mulai jam tujuh pagi ya.",
+     ["Saya sudah siapkan semuanya dll.", "Besok kita mulai jam tujuh pagi ya."]),
+    ("Jangan lupa bawa dokumen, laptop, charger, dll. sebelum berangkat ke kantor. Oke?",
+     ["Jangan lupa bawa dokumen,", "laptop, charger, dll. sebelum berangkat ke kantor.", "Oke?"]),
+    ("Kantornya di Jl. Sudirman No. 5 dekat halte. Harganya Rp. 10.000 saja.",
+     ["Kantornya di Jl. Sudirman No. 5 dekat halte.", "Harganya Rp. 10.000 saja."]),
+    ("Tentu saja bisa. Jadwalnya pukul 3.30 sore!", ["Tentu saja bisa.", "Jadwalnya pukul 3.30 sore!"]),
+])
+def test_tokenize(text, chunks):
+    assert tokenize(text) == chunks
+
+
+@pytest.mark.parametrize("text", [
+    "Ya. Tentu.",
+    "Oke, siap.",
+])
+def test_short_replies_stay_whole(text):
+    assert tokenize(text) == [text]
+
+
+def test_first_chunk_waits_for_min_length():
+    assert next_chunk_end("Ya, saya ", first=True) is None
+    # A comma only counts once the next word has arrived (it could be a degree like "S.Pd.").
+    assert next_chunk_end("Baik, saya mengerti, ", first=True) is None
+    assert next_chunk_end("Baik, saya mengerti, ya ", first=True) == len("Baik, saya mengerti,")
+
+
+def test_later_chunks_wait_for_a_sentence():
+    text = "setelah itu, kita lanjut, "
+    assert next_chunk_end(text, first=False) is None
+    assert next_chunk_end(text + "lalu selesai. ", first=False) == len(text + "lalu selesai.")
+
+
+def test_long_text_without_sentence_end_breaks_at_a_clause():
+    text = "kalimat ini sangat panjang sekali, " + "dan terus berlanjut tanpa titik " * 4
+    assert next_chunk_end(text, first=False) == len("kalimat ini sangat panjang sekali,")
+
+
+def test_no_break_before_the_following_whitespace_arrives():
+    assert next_chunk_end("Ini kalimat pertama yang cukup panjang.", first=True) is None
+
+
+@pytest.mark.parametrize("text", [
+    "Baik, Bpk. Budi, alarmnya sudah saya pasang untuk jam tujuh pagi. Jangan lupa bawa dokumen, laptop, "
+    "charger, dll. sebelum berangkat. Halo, Dr. Andi, S.Pd. akan hadir pukul 3.30 sore!",
+    "Saya sudah siapkan semuanya dll. Besok kita mulai jam tujuh pagi ya.",
+])
+def test_streamed_deltas_match_tokenize(text):
+    assert stream_chunks(text) == tokenize(text)
+
+
+@pytest.mark.parametrize("text, cleaned", [
+    ("Menurut **data**[1], harga naik[2][3].", "Menurut data, harga naik."),
+    ("Lihat [situs ini](https://example.com) untuk detail.", "Lihat situs ini untuk detail."),
+    ("## Ringkasan\n- poin satu", "Ringkasan\npoin satu"),
+])
+def test_clean_text_for_speech(text, cleaned):
+    assert clean_text_for_speech(text).strip() == cleaned
+
+
+@pytest.mark.parametrize("text, sentences", [
+    ("Menurut data[1], harga Rp. 10.000 naik[2][3]. Itu dll. Selesai. **Tabel**: ok",
+     ["Menurut data, harga Rp. 10.000 naik.", "Itu dll.", "Selesai.", "Tabel: ok"]),
+    ("Dr. Andi, S.Pd. mengajar di sini. Beliau ramah dsb. lalu pulang.",
+     ["Dr. Andi, S.Pd. mengajar di sini.", "Beliau ramah dsb. lalu pulang."]),
+    ("Satu.\n\n| a | b |\n", ["Satu.", "a b"]),
+])
+def test_speech_segmenter(text, sentences):
+    segmenter = SpeechSegmenter()
+    out = []
+    for i in range(0, len(text), 7):
+        out += segmenter.push(text[i:i + 7])
+    assert out + segmenter.flush() == sentences
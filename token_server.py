@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, request
+from flask import Flask, g, jsonify, request
 import os
 from dotenv import load_dotenv
 import logging
@@ -7,7 +7,9 @@ import json
 import datetime
 import jwt
 
-logging.basicConfig(level=logging.INFO)
+from log_config import configure_logging, bind_log_context, reset_log_context
+
+configure_logging(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
@@ -20,6 +22,11 @@ API_SECRET = os.getenv("LIVEKIT_API_SECRET")
 if not API_KEY or not API_SECRET:
     logger.critical("LIVEKIT_API_KEY or LIVEKIT_API_SECRET not set in environment!")
 
+@app.teardown_request
+def clear_log_context(exc):
+    # Request threads are reused; don't leak one caller's user_id into the next request's logs.
+    reset_log_context(g.pop('log_context_tokens', []))
+
 @app.route('/token', methods=['POST'])
 def generate_token():
     try:
@@ -40,11 +47,12 @@ def generate_token():
             logger.error("Missing 'user_id' (Firebase UID) in request body")
             return jsonify({"error": "'user_id' is required"}), 400
 
+        g.log_context_tokens = bind_log_context(user_id=user_id)
         unique_suffix = uuid.uuid4().hex[:12]
         room_name = f"usession-{user_id}-{unique_suffix}"
-        logger.info(f"Generated UNIQUE room name: {room_name} for user_id: {user_id}")
+        logger.info("Generated UNIQUE room name: %s for user_id: %s", room_name, user_id)
 
-        logger.debug(f"Generating token for identity: {identity}, room: {room_name}, user_id: {user_id}")
+        logger.debug("Generating token for identity: %s, room: %s, user_id: %s", identity, room_name, user_id)
 
         now = datetime.datetime.now()
         exp = now + datetime.timedelta(hours=6)
@@ -68,11 +76,11 @@ def generate_token():
 
         token = jwt.encode(payload, API_SECRET, algorithm="HS256")
 
-        # --- Added logging line ---
-        logger.info(f"Generated JWT Token: {token}")
-        # --------------------------
+        # Never log the token itself: it is a bearer credential for the room.
+        logger.info("Generated JWT for room %s (expires %s)", room_name, exp.isoformat(timespec='seconds'))
 
-        logger.debug(f"Generated token payload (before encoding): {json.dumps(payload, indent=2)}") # Log the payload for clarity
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Generated token claims: %s", json.dumps({k: v for k, v in payload.items() if k != "metadata"}))
 
         response = jsonify({
             "token": token,
@@ -0,0 +1,41 @@
+import logging
+from typing import Callable, List, Optional
+
+from livekit.agents import APIConnectOptions, stt, utils
+
+logger = logging.getLogger("transcript-hooks")
+
+TranscriptListener = Callable[[str], None]
+
+
+class TranscriptHookSTT(stt.STT):
+    """Wraps a non-streaming STT and reports every final transcript to listeners.
+
+    VoicePipelineAgent only surfaces the user's text once the turn is committed;
+    listeners here see it as soon as STT returns, i.e. while end-of-turn
+    detection is still running. Listeners must be quick and non-blocking; start
+    a task for anything slow.
+    """
+
+    def __init__(self, inner: stt.STT) -> None:
+        super().__init__(capabilities=inner.capabilities)
+        self._inner = inner
+        self._listeners: List[TranscriptListener] = []
+
+    def add_listener(self, listener: TranscriptListener) -> None:
+        self._listeners.append(listener)
+
+    async def _recognize_impl(self, buffer: utils.AudioBuffer, *, language: Optional[str] = None,
+                              conn_options: APIConnectOptions) -> stt.SpeechEvent:
+        event = await self._inner.recognize(buffer, language=language, conn_options=conn_options)
+        text = event.alternatives[0].text.strip() if event.alternatives else ""
+        if text:
+            for listener in self._listeners:
+                try:
+                    listener(text)
+                except Exception as e:
+                    logger.error("Transcript listener %s failed: %s", listener, e, exc_info=True)
+        return event
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
@@ -0,0 +1,365 @@
+import asyncio
+import concurrent.futures
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+from livekit import rtc
+from livekit.agents import utils, vad as agents_vad
+from livekit.plugins.silero import onnx_model
+
+logger = logging.getLogger("vad-engine")
+
+VAD_SAMPLE_RATE = 16000
+VAD_WINDOW_SAMPLES = 512
+VAD_CONTEXT_SAMPLES = 64
+VAD_STATE_SHAPE = (2, 128)
+VAD_MAX_BATCH = 64
+VAD_MAX_BATCH_WAIT = 0.001
+
+
+@dataclass
+class VADSessionState:
+    """Recurrent state of one audio stream; the engine never mixes these between sessions."""
+    context: np.ndarray = field(default_factory=lambda: np.zeros(VAD_CONTEXT_SAMPLES, dtype=np.float32))
+    rnn_state: np.ndarray = field(default_factory=lambda: np.zeros(VAD_STATE_SHAPE, dtype=np.float32))
+
+
+@dataclass
+class _InferenceRequest:
+    state: VADSessionState
+    window: np.ndarray
+    future: concurrent.futures.Future
+
+
+class SileroModel:
+    """The Silero ONNX session plus whole-clip scoring; no threads of its own.
+
+    onnxruntime sessions are thread-safe, so one instance can serve the batch
+    engine and the STT trimming at once. Pass onnx_session to reuse a session
+    that is already loaded (e.g. the one owned by a per-job silero.VAD).
+    """
+
+    _shared: Optional["SileroModel"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, *, force_cpu: bool = True, onnx_session=None) -> None:
+        self.session = onnx_session or onnx_model.new_inference_session(force_cpu)
+        self.sample_rate_nd = np.array(VAD_SAMPLE_RATE, dtype=np.int64)
+
+    @classmethod
+    def shared(cls) -> "SileroModel":
+        """Returns the process-wide model, loading it on first use."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def speech_probabilities(self, samples: np.ndarray) -> np.ndarray:
+        """Per-window speech probabilities for a whole 16 kHz float32 clip.
+
+        Runs on the caller's thread with a fresh state.
+        """
+        num_windows = len(samples) // VAD_WINDOW_SAMPLES
+        probabilities = np.empty(num_windows, dtype=np.float32)
+        inputs = np.zeros((1, VAD_CONTEXT_SAMPLES + VAD_WINDOW_SAMPLES), dtype=np.float32)
+        rnn_state = np.zeros((VAD_STATE_SHAPE[0], 1, VAD_STATE_SHAPE[1]), dtype=np.float32)
+        for i in range(num_windows):
+            if i:
+                inputs[0, :VAD_CONTEXT_SAMPLES] = inputs[0, -VAD_CONTEXT_SAMPLES:]
+            inputs[0, VAD_CONTEXT_SAMPLES:] = samples[i * VAD_WINDOW_SAMPLES:(i + 1) * VAD_WINDOW_SAMPLES]
+            out, rnn_state = self.session.run(None, {"input": inputs, "state": rnn_state, "sr": self.sample_rate_nd})
+            probabilities[i] = out[0, 0]
+        return probabilities
+
+
+class BatchedVADEngine:
+    """One Silero ONNX session shared by every VAD stream in the worker process.
+
+    Streams submit 512-sample windows from any thread or event loop; a single
+    inference thread stacks whatever is queued (up to max_batch, waiting at most
+    max_batch_wait for stragglers) into one batched run and scatters the
+    probabilities and updated recurrent states back to each session.
+    """
+
+    _shared: Optional["BatchedVADEngine"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, *, model: Optional[SileroModel] = None, max_batch: int = VAD_MAX_BATCH,
+                 max_batch_wait: float = VAD_MAX_BATCH_WAIT) -> None:
+        self.model = model or SileroModel()
+        self._session = self.model.session
+        self._sample_rate_nd = self.model.sample_rate_nd
+        self._max_batch = max_batch
+        self._max_batch_wait = max_batch_wait
+        self._queue: "queue.SimpleQueue[Optional[_InferenceRequest]]" = queue.SimpleQueue()
+        self._closed = False
+        self.batches_run = 0
+        self.windows_run = 0
+        self._thread = threading.Thread(target=self._run, name="vad-engine", daemon=True)
+        self._thread.start()
+        logger.info("Batched VAD engine started (max_batch=%d, max_wait=%.1fms).", max_batch, max_batch_wait * 1000)
+
+    @classmethod
+    def shared(cls) -> "BatchedVADEngine":
+        """Returns the process-wide engine, running on the process-wide SileroModel."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(model=SileroModel.shared())
+            return cls._shared
+
+    def submit(self, state: VADSessionState, window: np.ndarray) -> concurrent.futures.Future:
+        if self._closed:
+            raise RuntimeError("VAD engine is closed")
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        self._queue.put(_InferenceRequest(state=state, window=window, future=future))
+        return future
+
+    async def infer(self, state: VADSessionState, window: np.ndarray) -> float:
+        """Speech probability for one 512-sample float32 window at 16 kHz."""
+        return await asyncio.wrap_future(self.submit(state, window))
+
+    def close(self) -> None:
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=2.0)
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.perf_counter() + self._max_batch_wait
+            stop = False
+            while len(batch) < self._max_batch:
+                try:
+                    remaining = deadline - time.perf_counter()
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            # Drop windows whose stream was closed while queued; once running, a future can no longer be cancelled.
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            try:
+                if batch:
+                    self._run_batch(batch)
+            except Exception as e:
+                # Never let one bad batch kill the only inference thread every session depends on.
+                logger.error("Batched VAD engine failed on a batch of %d windows: %s", len(batch), e, exc_info=True)
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+            if stop:
+                return
+
+    def _run_batch(self, batch: List[_InferenceRequest]) -> None:
+        n = len(batch)
+        inputs = np.empty((n, VAD_CONTEXT_SAMPLES + VAD_WINDOW_SAMPLES), dtype=np.float32)
+        states = np.empty((VAD_STATE_SHAPE[0], n, VAD_STATE_SHAPE[1]), dtype=np.float32)
+        for i, request in enumerate(batch):
+            inputs[i, :VAD_CONTEXT_SAMPLES] = request.state.context
+            inputs[i, VAD_CONTEXT_SAMPLES:] = request.window
+            states[:, i, :] = request.state.rnn_state
+        try:
+            out, new_states = self._session.run(None, {"input": inputs, "state": states, "sr": self._sample_rate_nd})
+        except Exception as e:
+            logger.error("Batched VAD inference failed for %d windows: %s", n, e, exc_info=True)
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        self.batches_run += 1
+        self.windows_run += n
+        for i, request in enumerate(batch):
+            request.state.context = inputs[i, -VAD_CONTEXT_SAMPLES:].copy()
+            request.state.rnn_state = new_states[:, i, :].copy()
+            request.future.set_result(float(out[i, 0]))
+
+
+class SharedVAD(agents_vad.VAD):
+    """Drop-in replacement for silero.VAD whose streams run on the shared BatchedVADEngine."""
+
+    def __init__(self, *, engine: Optional[BatchedVADEngine] = None, min_speech_duration: float = 0.05,
+                 min_silence_duration: float = 0.55, prefix_padding_duration: float = 0.5,
+                 max_buffered_speech: float = 60.0, activation_threshold: float = 0.5) -> None:
+        super().__init__(capabilities=agents_vad.VADCapabilities(update_interval=VAD_WINDOW_SAMPLES / VAD_SAMPLE_RATE))
+        self._engine = engine or BatchedVADEngine.shared()
+        self._min_speech_duration = min_speech_duration
+        self._min_silence_duration = min_silence_duration
+        self._prefix_padding_duration = prefix_padding_duration
+        self._max_buffered_speech = max_buffered_speech
+        self._activation_threshold = activation_threshold
+
+    def stream(self) -> "SharedVADStream":
+        return SharedVADStream(self)
+
+
+class SharedVADStream(agents_vad.VADStream):
+    """Same speech/silence state machine as the Silero plugin stream, minus the private model."""
+
+    def __init__(self, shared_vad: SharedVAD) -> None:
+        self._opts = shared_vad
+        self._session_state = VADSessionState()
+        super().__init__(shared_vad)
+
+    async def _main_task(self) -> None:
+        opts = self._opts
+        window_duration = VAD_WINDOW_SAMPLES / VAD_SAMPLE_RATE
+        input_sample_rate = 0
+        resampler: Optional[rtc.AudioResampler] = None
+        inference_pending = np.empty(0, dtype=np.float32)
+        input_pending = np.empty(0, dtype=np.int16)
+        input_copy_fract = 0.0
+
+        speech_buffer: Optional[np.ndarray] = None
+        speech_buffer_index = 0
+        speech_buffer_max_reached = False
+        prefix_padding_samples = 0
+
+        pub_speaking = False
+        pub_speech_duration = 0.0
+        pub_silence_duration = 0.0
+        pub_current_sample = 0
+        pub_timestamp = 0.0
+        speech_threshold_duration = 0.0
+        silence_threshold_duration = 0.0
+        # Same smoothing as the Silero plugin: 0.35 * previous + 0.65 * sample, seeded by the first sample.
+        exp_filter = utils.ExpFilter(alpha=0.35)
+
+        def speech_frame() -> rtc.AudioFrame:
+            return rtc.AudioFrame(
+                data=speech_buffer[:speech_buffer_index].tobytes(),
+                sample_rate=input_sample_rate,
+                num_channels=1,
+                samples_per_channel=speech_buffer_index,
+            )
+
+        async for input_frame in self._input_ch:
+            if not isinstance(input_frame, rtc.AudioFrame):
+                continue
+
+            if not input_sample_rate:
+                input_sample_rate = input_frame.sample_rate
+                speech_buffer = np.empty(int(opts._max_buffered_speech * input_sample_rate), dtype=np.int16)
+                prefix_padding_samples = int(opts._prefix_padding_duration * input_sample_rate)
+                if input_sample_rate != VAD_SAMPLE_RATE:
+                    resampler = rtc.AudioResampler(
+                        input_rate=input_sample_rate,
+                        output_rate=VAD_SAMPLE_RATE,
+                        quality=rtc.AudioResamplerQuality.QUICK,
+                    )
+            elif input_frame.sample_rate != input_sample_rate:
+                logger.error("A frame with a different sample rate was already pushed to this VAD stream.")
+                continue
+
+            samples = np.frombuffer(input_frame.data, dtype=np.int16)
+            if input_frame.num_channels > 1:
+                samples = samples.reshape(-1, input_frame.num_channels).mean(axis=1).astype(np.int16)
+            input_pending = np.concatenate((input_pending, samples))
+
+            mono_frame = rtc.AudioFrame(
+                data=samples.tobytes(), sample_rate=input_sample_rate,
+                num_channels=1, samples_per_channel=len(samples),
+            )
+            for frame in (resampler.push(mono_frame) if resampler else [mono_frame]):
+                inference_pending = np.concatenate(
+                    (inference_pending, np.frombuffer(frame.data, dtype=np.int16).astype(np.float32) / 32768.0)
+                )
+
+            while len(inference_pending) >= VAD_WINDOW_SAMPLES:
+                window = inference_pending[:VAD_WINDOW_SAMPLES]
+                inference_pending = inference_pending[VAD_WINDOW_SAMPLES:]
+
+                start_time = time.perf_counter()
+                raw_probability = await self._opts._engine.infer(self._session_state, window)
+                inference_duration = time.perf_counter() - start_time
+                smoothed_probability = exp_filter.apply(exp=1.0, sample=raw_probability)
+
+                # Carry the matching span of original-rate audio along for the speech buffer.
+                to_copy_fract = window_duration * input_sample_rate + input_copy_fract
+                to_copy = min(int(to_copy_fract), len(input_pending))
+                input_copy_fract = to_copy_fract - int(to_copy_fract)
+                input_window = input_pending[:to_copy]
+                input_pending = input_pending[to_copy:]
+
+                available = len(speech_buffer) - speech_buffer_index
+                to_buffer = min(to_copy, available)
+                if to_buffer > 0:
+                    speech_buffer[speech_buffer_index:speech_buffer_index + to_buffer] = input_window[:to_buffer]
+                    speech_buffer_index += to_buffer
+                elif not speech_buffer_max_reached:
+                    speech_buffer_max_reached = True
+                    logger.warning("max_buffered_speech reached, ignoring further data for the current speech input")
+
+                pub_current_sample += to_copy
+                pub_timestamp += window_duration
+                if pub_speaking:
+                    pub_speech_duration += window_duration
+                else:
+                    pub_silence_duration += window_duration
+
+                self._event_ch.send_nowait(agents_vad.VADEvent(
+                    type=agents_vad.VADEventType.INFERENCE_DONE,
+                    samples_index=pub_current_sample,
+                    timestamp=pub_timestamp,
+                    silence_duration=pub_silence_duration,
+                    speech_duration=pub_speech_duration,
+                    probability=smoothed_probability,
+                    inference_duration=inference_duration,
+                    frames=[rtc.AudioFrame(
+                        data=input_window.tobytes(), sample_rate=input_sample_rate,
+                        num_channels=1, samples_per_channel=len(input_window),
+                    )],
+                    speaking=pub_speaking,
+                    raw_accumulated_silence=silence_threshold_duration,
+                    raw_accumulated_speech=speech_threshold_duration,
+                ))
+
+                if smoothed_probability >= opts._activation_threshold:
+                    speech_threshold_duration += window_duration
+                    silence_threshold_duration = 0.0
+                    if not pub_speaking and speech_threshold_duration >= opts._min_speech_duration:
+                        pub_speaking = True
+                        pub_silence_duration = 0.0
+                        pub_speech_duration = speech_threshold_duration
+                        self._event_ch.send_nowait(agents_vad.VADEvent(
+                            type=agents_vad.VADEventType.START_OF_SPEECH,
+                            samples_index=pub_current_sample,
+                            timestamp=pub_timestamp,
+                            silence_duration=pub_silence_duration,
+                            speech_duration=pub_speech_duration,
+                            frames=[speech_frame()],
+                            speaking=True,
+                        ))
+                else:
+                    silence_threshold_duration += window_duration
+                    speech_threshold_duration = 0.0
+                    if not pub_speaking and speech_buffer_index > prefix_padding_samples:
+                        # Keep only the prefix padding while nobody is talking.
+                        speech_buffer[:prefix_padding_samples] = speech_buffer[speech_buffer_index - prefix_padding_samples:speech_buffer_index]
+                        speech_buffer_index = prefix_padding_samples
+                        speech_buffer_max_reached = False
+                    if pub_speaking and silence_threshold_duration >= opts._min_silence_duration:
+                        pub_speaking = False
+                        pub_speech_duration = 0.0
+                        pub_silence_duration = silence_threshold_duration
+                        self._event_ch.send_nowait(agents_vad.VADEvent(
+                            type=agents_vad.VADEventType.END_OF_SPEECH,
+                            samples_index=pub_current_sample,
+                            timestamp=pub_timestamp,
+                            silence_duration=pub_silence_duration,
+                            speech_duration=pub_speech_duration,
+                            frames=[speech_frame()],
+                            speaking=False,
+                        ))
+                        keep = min(prefix_padding_samples, speech_buffer_index)
+                        speech_buffer[:keep] = speech_buffer[speech_buffer_index - keep:speech_buffer_index]
+                        speech_buffer_index = keep
+                        speech_buffer_max_reached = False